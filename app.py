@@ -1,4 +1,7 @@
-from flask import Flask, jsonify, request
+import startup_profile
+startup_profile.install()
+
+from flask import Flask, jsonify, request, Response
 import pandas as pd
 from collections import Counter
 import re
@@ -6,18 +9,96 @@ from urllib.parse import unquote
 import numpy as np
 import csv
 import json
+import hashlib
+from city_map import load_company_points, build_cluster_grid, clamp_zoom, query_clusters
+from rankings import COMPANY_FIELDS, build_company_table, build_ranking_index, filter_mask, top_k
+from peers import build_peer_stats
+from timeline import TIMELINE_DIMENSIONS, build_founding_matrices, founding_series
+from search import build_search_index, search
+from similar import build_similar_index
+from export import EXPORT_FORMATS, STREAMERS, build_export_table, export_rows
+from logo_store import LOGO_SIZES, MAX_SPRITE_LOGOS, LogoStore
+from financials import FINANCIAL_PEER_GROUPS, align_company_names, build_financial_series, build_financial_peer_index, compare_to_peers
+from data_collection.process_financial_data import DERIVED_METRICS, load_financial_data
+from wages import build_wage_lookup, build_company_wages
+from data_collection.abs_earnings import load_earnings
+from data_collection.profile_schema import child_tables_from_flat
+from profiling import install_request_profiler
+from single_flight import SingleFlight, SingleFlightTimeout, coalesced
 
 app = Flask(__name__)
 
 # Load the data
-df = pd.read_excel('data/processed_data/cleaned_state_data.xlsx')
+DATASET_PATH = 'data/processed_data/cleaned_state_data.xlsx'
 
-import pandas as pd
-import csv
-from flask import jsonify
-from urllib.parse import unquote
-import json
-import numpy as np
+with startup_profile.timed('read cleaned_state_data.xlsx'):
+    df = pd.read_excel(DATASET_PATH)
+
+# Precomputed results are tied to the exact dataset file they were built from
+with open(DATASET_PATH, 'rb') as f:
+    DATASET_VERSION = hashlib.sha1(f.read()).hexdigest()[:12]
+
+# Per-request profiling, only active when configured (see profiling.py)
+install_request_profiler(app, DATASET_VERSION)
+
+# Concurrent identical requests to the expensive aggregate endpoints share one computation
+single_flight = SingleFlight()
+
+# Load Australian states GeoJSON
+with startup_profile.timed('read australian-states.json'):
+    with open('data/map/australian-states.json', 'r') as f:
+        australia_geojson = json.load(f)
+
+# Deduplicated company table and precomputed arrays for ranking queries
+with startup_profile.timed('build ranking index'):
+    companies = build_company_table(df)
+    ranking_index = build_ranking_index(companies)
+
+# Inverted index over descriptions and specialities for free-text search
+with startup_profile.timed('build search index'):
+    search_index = build_search_index(companies, version=DATASET_VERSION)
+
+# Founding counts per year, overall and per industry, country and size
+with startup_profile.timed('build founding matrices'):
+    founding_matrices = build_founding_matrices(companies)
+
+# Per-company percentiles and peer-group averages for the comparison page
+with startup_profile.timed('build peer stats'):
+    peer_stats, overall_averages = build_peer_stats(companies)
+
+# Company locations with coordinates, clustered per zoom level for the city map
+with startup_profile.timed('build city map clusters'):
+    city_points = load_company_points('data/processed_data/city_locations.csv', df)
+    city_clusters = build_cluster_grid(city_points)
+
+# Company logos by company_id; resized variants are rendered on first request
+with startup_profile.timed('index company logos'):
+    logo_store = LogoStore(companies)
+    companies['logo_id'] = companies['name'].map(logo_store.ids_by_name).astype('Int64')
+
+# Each company's nearest neighbours by specialities, description and industry
+with startup_profile.timed('build similar companies'):
+    similar_companies = build_similar_index(companies, fields=('name', 'industry', 'hq_country', 'logo_id'))
+
+# Arrow copy of the company table that exports filter and stream without going through Python objects
+with startup_profile.timed('build export table'):
+    export_table = build_export_table(companies)
+
+# Financial time series per company and peer arrays for the financial comparison endpoints
+with startup_profile.timed('build financial series'):
+    financials = align_company_names(load_financial_data('data/processed_data/processed_financial_data.parquet'), df)
+    financial_series = build_financial_series(financials)
+    financial_peer_index = build_financial_peer_index(financials, companies)
+
+# ABS weekly earnings by state, industry and sector, joined to each company once
+with startup_profile.timed('build wage lookups'):
+    earnings = load_earnings('data/processed_data/abs_earnings.parquet')
+    wage_lookup = build_wage_lookup(earnings)
+    company_wages = build_company_wages(companies, wage_lookup)
+
+# Logo URLs carrying ?v=<version> never change content, so browsers may keep them forever
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'public, max-age=3600'
 
 @app.route('/api/create_csv_files')
 def create_csv_files():
@@ -267,10 +348,6 @@ def create_csv_files():
         "files": ["company_data.csv", "world_data.csv", "australia_data.csv", "city_locations.csv"]
     }), 200
 
-# Load Australian states GeoJSON
-with open('data/map/australian-states.json', 'r') as f:
-    australia_geojson = json.load(f)
-
 # Mapping of state codes to names
 state_code_to_name = {
     feature['properties']['STATE_CODE']: feature['properties']['STATE_NAME']
@@ -426,29 +503,18 @@ def industry_breakdown():
     industry_breakdown = df['industry'].value_counts().to_dict()
     return jsonify(industry_breakdown)
 
+# Company locations as a typed table (one row per listed office), parsed once from the dataset
+with startup_profile.timed('build company location table'):
+    company_locations = child_tables_from_flat(df[['locations']])['locations']
+    location_rows = company_locations.join(
+        df[['name', 'follower_count', 'company_size_on_linkedin', 'founded_year']], on='company_id')
+    location_rows['country'] = location_rows['country'].map(lambda code: country_map.get(code, code))
+
 @app.route('/api/geographical_distribution')
+@coalesced(single_flight, DATASET_VERSION)
 def geographical_distribution():
-    def extract_locations(row):
-        if pd.isna(row['locations']):
-            return []
-        try:
-            locations_list = json.loads(row['locations']) if isinstance(row['locations'], str) else row['locations']
-            return [(country_map.get(loc['country'], loc['country']), loc.get('state')) 
-                    for loc in locations_list if isinstance(loc, dict) and 'country' in loc]
-        except json.JSONDecodeError:
-            return []
-        except Exception as e:
-            print(f"Error processing location: {row['locations']}. Error: {str(e)}")
-            return []
-
-    # Apply the function to create a new column with extracted countries and states
-    df['extracted_locations'] = df.apply(extract_locations, axis=1)
-
-    # Explode the dataframe so each location is on a separate row
-    exploded_df = df.explode('extracted_locations')
-
-    # Split the extracted_locations into separate columns
-    exploded_df[['country', 'state']] = pd.DataFrame(exploded_df['extracted_locations'].tolist(), index=exploded_df.index)
+    # One row per company location, already parsed at startup
+    exploded_df = location_rows
 
     # Group by country and aggregate
     grouped = exploded_df.groupby('country').agg({
@@ -494,6 +560,28 @@ def geographical_distribution():
         'australia_geojson': australia_geojson
     })
 
+@app.route('/api/city_map')
+def city_map():
+    zoom = request.args.get('zoom', default=4, type=int)
+    bbox = request.args.get('bbox')
+
+    if bbox:
+        try:
+            bbox = [float(v) for v in bbox.split(',')]
+        except ValueError:
+            return jsonify({"error": "bbox must be min_lng,min_lat,max_lng,max_lat"}), 400
+        if len(bbox) != 4:
+            return jsonify({"error": "bbox must be min_lng,min_lat,max_lng,max_lat"}), 400
+
+    # Report the level actually served, not the requested one
+    zoom = clamp_zoom(city_clusters, zoom)
+    clusters = query_clusters(city_clusters, zoom, bbox)
+    return jsonify({
+        'zoom': zoom,
+        'total_locations': len(city_points),
+        'clusters': clusters
+    })
+
 @app.route('/api/follower_count_analysis')
 def follower_count_analysis():
     follower_counts = df['follower_count'].dropna().tolist()
@@ -501,32 +589,105 @@ def follower_count_analysis():
 
 @app.route('/api/top_companies_by_followers')
 def top_companies_by_followers():
-    # Sort companies by follower count and get top 20
-    top_companies = df.sort_values('follower_count', ascending=False).head(20)
-    
-    # Prepare data for API response
-    result = top_companies[['name', 'follower_count', 'industry']].to_dict('records')
-    
+    # Top 20 companies by follower count
+    result = top_k(companies, ranking_index, 'follower_count', 20, fields=('name', 'follower_count', 'industry'))
+    for row in result:
+        del row['rank']
     return jsonify(result)
 
+@app.route('/api/top_k')
+def top_k_companies():
+    metric = request.args.get('metric', default='follower_count')
+    k = request.args.get('k', default=10, type=int)
+    group_by = request.args.get('group_by')
+    ascending = request.args.get('order', default='desc') == 'asc'
+
+    if metric not in ranking_index['values']:
+        return jsonify({"error": f"Unknown numeric metric: {metric}"}), 400
+    if group_by is not None and group_by not in COMPANY_FIELDS:
+        return jsonify({"error": f"group_by must be one of: {', '.join(COMPANY_FIELDS)}"}), 400
+    if k < 1:
+        return jsonify({"error": "k must be at least 1"}), 400
+
+    result = top_k(companies, ranking_index, metric, k, group_by=group_by,
+                   mask=filter_mask(companies, request.args), ascending=ascending,
+                   fields=('name', 'industry', 'logo_id'))
+    return jsonify({
+        'metric': metric,
+        'k': k,
+        'group_by': group_by,
+        'results': result
+    })
+
+@app.route('/api/search')
+def search_companies():
+    query = request.args.get('q', default='').strip()
+    k = request.args.get('k', default=10, type=int)
+
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    if k < 1:
+        return jsonify({"error": "k must be at least 1"}), 400
+
+    total, result = search(companies, search_index, query, k, mask=filter_mask(companies, request.args),
+                           fields=('name', 'industry', 'hq_city', 'hq_state', 'hq_country', 'logo_id'))
+    return jsonify({
+        'query': query,
+        'k': k,
+        'total': total,
+        'dataset_version': search_index['version'],
+        'results': result
+    })
+
+@app.route('/api/export')
+def export():
+    export_format = request.args.get('format', default='csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    columns = [column.strip() for column in request.args.get('columns', default='').split(',') if column.strip()]
+    unknown = [column for column in columns if column not in export_table.column_names]
+    if unknown:
+        return jsonify({"error": f"Unknown columns: {', '.join(unknown)}"}), 400
+
+    table = export_rows(export_table, filter_mask(companies, request.args), columns)
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    response = Response(STREAMERS[export_format](table), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="ausjobs_companies_{DATASET_VERSION}.{extension}"'
+    response.headers['X-Row-Count'] = str(table.num_rows)
+    return response
+
 @app.route('/api/founded_year_timeline')
 def founded_year_timeline():
-    year_counts = df['founded_year'].value_counts().sort_index().to_dict()
-    return jsonify(year_counts)
+    # Optional subset of one dimension, one parameter per group since labels may contain
+    # commas, e.g. ?industry=Software Development&industry=Leisure, Travel %26 Tourism
+    filters = {}
+    for field in TIMELINE_DIMENSIONS:
+        labels = [value.strip() for value in request.args.getlist(field) if value.strip()]
+        if labels:
+            filters[field] = labels
+    if len(filters) > 1:
+        return jsonify({"error": f"Filter on only one of: {', '.join(TIMELINE_DIMENSIONS)}"}), 400
+
+    field, labels = next(iter(filters.items())) if filters else (None, None)
+    try:
+        result = founding_series(founding_matrices, field, labels)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    result['filter'] = {field: labels} if field else {}
+    return jsonify(result)
 
 @app.route('/api/top_companies_followers')
 def top_companies_followers():
     top_n = request.args.get('n', default=10, type=int)
-    top_companies = df.nlargest(top_n, 'follower_count')[['name', 'follower_count']]
-    return jsonify(top_companies.to_dict(orient='records'))
-
-from flask import jsonify
-from collections import Counter
-import re
-import pandas as pd
-import numpy as np
+    if top_n <= 0:
+        return jsonify([])
+    result = top_k(companies, ranking_index, 'follower_count', top_n, fields=('name', 'follower_count'))
+    for row in result:
+        del row['rank']
+    return jsonify(result)
 
 @app.route('/api/specialties_wordcloud')
+@coalesced(single_flight, DATASET_VERSION)
 def specialties_wordcloud():
     # Common stop words (you can expand this list)
     stop_words = set(['and', 'the', 'to', 'of', 'in', 'for', 'a', 'an'])
@@ -538,16 +699,17 @@ def specialties_wordcloud():
     csv_rows = []
     
     # Clean industry values: replace NaN with 'Unknown' and convert to string
-    df['industry_clean'] = df['industry'].fillna('Unknown').astype(str)
+    # (kept local: writing a column to the shared df races with other requests)
+    industry_clean = df['industry'].fillna('Unknown').astype(str)
     
     # Group the dataframe by cleaned industry
-    for industry in df['industry_clean'].unique():
+    for industry in industry_clean.unique():
         # Skip empty or whitespace-only industry names
         if not industry.strip():
             continue
             
         # Filter dataframe for current industry
-        industry_df = df[df['industry_clean'] == industry]
+        industry_df = df[industry_clean == industry]
         
         # Combine all specialties for this industry into a single string
         industry_specialties = ' '.join(industry_df['specialities'].dropna().astype(str))
@@ -608,77 +770,172 @@ def employee_follower_correlation():
 def company_details(company_name):
     decoded_name = unquote(company_name)
     
-    company = df[df['name'] == decoded_name]
-    
-    if company.empty:
+    details = company_details_index.get(decoded_name)
+    if details is None:
         return jsonify({"error": "Company not found"}), 404
     
-    company = company.iloc[0]
-    
-    # Calculate mean of numeric columns only
-    numeric_columns = df.select_dtypes(include=[np.number]).columns
-    avg_data = df[numeric_columns].mean()
-    
+    return jsonify(details)
+
+def build_company_details():
     def safe_int(value):
         try:
             return int(value) if pd.notnull(value) else None
         except:
             return None
 
-    def count_specialties(specialties):
-        if pd.isna(specialties):
-            return 0
-        return len(str(specialties).split(','))
+    def safe_value(value):
+        return value if pd.notnull(value) else None
+
+    index = {}
+    for company in companies.to_dict(orient='records'):
+        stats = peer_stats[company['name']]
+        logo_id = logo_store.ids_by_name.get(company['name'])
+        index[company['name']] = {
+            'name': company['name'],
+            'industry': safe_value(company['industry']),
+            'description': safe_value(company['description']),
+            'website': safe_value(company['website']),
+            'follower_count': safe_int(company['follower_count']),
+            'avg_follower_count': safe_int(overall_averages['follower_count']),
+            'company_size': safe_int(company['company_size_on_linkedin']),
+            'avg_company_size': safe_int(overall_averages['company_size']),
+            'founded_year': safe_int(company['founded_year']),
+            'avg_founded_year': safe_int(overall_averages['founded_year']),
+            'num_specialties': company['num_specialties'],
+            'avg_num_specialties': overall_averages['num_specialties'],
+            'num_countries': company['num_countries'],
+            'avg_num_countries': overall_averages['num_countries'],
+            'percentiles': stats['percentiles'],
+            'peers': stats['peers'],
+            'dataset_version': DATASET_VERSION,
+            'Image_Path': safe_value(company['Image_Path']),
+            'logo_id': logo_id,
+            'logo_version': logo_store.version(logo_id) if logo_id is not None else None
+        }
+    return index
+
+# Company details are answered from this dict, built once per dataset version
+with startup_profile.timed('build company details'):
+    company_details_index = build_company_details()
+
+def logo_response(body, mimetype, etag, versioned):
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE if versioned else REVALIDATE_CACHE
+    return response.make_conditional(request)
+
+def parse_logo_size(raw, default):
+    if raw is None:
+        return default
+    if raw == 'original':
+        return None
+    try:
+        size = int(raw)
+    except ValueError:
+        size = None
+    if size not in LOGO_SIZES:
+        raise ValueError(f"size must be one of: {', '.join(map(str, LOGO_SIZES))}, original")
+    return size
+
+@app.route('/api/logo/<int:company_id>')
+def logo(company_id):
+    if company_id not in logo_store.logos:
+        return jsonify({"error": "Logo not found"}), 404
+    try:
+        size = parse_logo_size(request.args.get('size'), default=None)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    version = logo_store.version(company_id)
+    body, mimetype = logo_store.variant(company_id, size)
+    return logo_response(body, mimetype, f"{version}-{size or 'original'}",
+                         versioned=request.args.get('v') == version)
+
+@app.route('/api/logo_sprite')
+def logo_sprite():
+    # Tile i of the strip (x = i * size) is the i-th requested company_id
+    try:
+        ids = [int(v) for v in request.args.get('ids', '').split(',') if v.strip()]
+        size = parse_logo_size(request.args.get('size'), default=LOGO_SIZES[0])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not ids or size is None:
+        return jsonify({"error": "ids must be a comma-separated list of company ids and size a thumbnail size"}), 400
+    if len(ids) > MAX_SPRITE_LOGOS:
+        return jsonify({"error": f"At most {MAX_SPRITE_LOGOS} logos per sprite"}), 400
+
+    version = logo_store.sprite_version(ids, size)
+    return logo_response(logo_store.sprite(ids, size), 'image/webp', version,
+                         versioned=request.args.get('v') == version)
+
+@app.route('/api/similar/<path:company_name>')
+def similar_to_company(company_name):
+    neighbours = similar_companies['neighbours'].get(unquote(company_name))
+    if neighbours is None:
+        return jsonify({"error": "Company not found"}), 404
+    k = request.args.get('k', default=similar_companies['k'], type=int)
+    return jsonify({
+        'company': unquote(company_name),
+        'method': similar_companies['method'],
+        'similar': neighbours[:max(k, 0)]
+    })
 
-    def count_countries(locations):
-        if pd.isna(locations):
-            return 0
-        try:
-            # Try parsing as JSON
-            locations_list = json.loads(locations)
-        except json.JSONDecodeError:
-            # If not JSON, try splitting by comma
-            return len(set(str(locations).split(',')))
-        
-        if isinstance(locations_list, list):
-            return len(set(loc.get('country') for loc in locations_list if isinstance(loc, dict) and 'country' in loc))
-        else:
-            return 1  # If it's not a list, assume it's a single location
+@app.route('/api/financials/<path:company_name>')
+def company_financials(company_name):
+    series = financial_series.get(unquote(company_name))
+    if series is None:
+        return jsonify({"error": "No financial data for this company"}), 404
+    return jsonify(series)
+
+@app.route('/api/financial_peers/<path:company_name>')
+def company_financial_peers(company_name):
+    series = financial_series.get(unquote(company_name))
+    if series is None:
+        return jsonify({"error": "No financial data for this company"}), 404
+
+    metric = request.args.get('metric', default='revenue_growth')
+    group = request.args.get('group', default='industry')
+    if metric not in DERIVED_METRICS:
+        return jsonify({"error": f"metric must be one of: {', '.join(DERIVED_METRICS)}"}), 400
+    if group not in FINANCIAL_PEER_GROUPS:
+        return jsonify({"error": f"group must be one of: {', '.join(FINANCIAL_PEER_GROUPS)}"}), 400
+
+    return jsonify(compare_to_peers(series, financial_peer_index, metric, group))
+
+@app.route('/api/wages')
+def wages():
+    dimension = request.args.get('dimension', default='state')
+    if dimension not in wage_lookup['series']:
+        return jsonify({"error": f"dimension must be one of: {', '.join(wage_lookup['series'])}"}), 400
+    return jsonify({
+        'dimension': dimension,
+        'latest_period': wage_lookup['period'],
+        'series': wage_lookup['series'][dimension]
+    })
 
-    # Calculate average number of specialties and countries
-    df['num_specialties'] = df['specialities'].apply(count_specialties)
-    df['num_countries'] = df['locations'].apply(count_countries)
-    avg_specialties = df['num_specialties'].mean()
-    avg_countries = df['num_countries'].mean()
-
-    details = {
-        'name': company['name'],
-        'industry': company['industry'],
-        'description': company['description'],
-        'website': company['website'],
-        'follower_count': safe_int(company['follower_count']),
-        'avg_follower_count': safe_int(avg_data.get('follower_count')),
-        'company_size': safe_int(company['company_size_on_linkedin']),
-        'avg_company_size': safe_int(avg_data.get('company_size_on_linkedin')),
-        'founded_year': safe_int(company['founded_year']),
-        'avg_founded_year': safe_int(avg_data.get('founded_year')),
-        'num_specialties': count_specialties(company['specialities']),
-        'avg_num_specialties': round(avg_specialties),  # Rounded to integer
-        'num_countries': count_countries(company['locations']),
-        'avg_num_countries': round(avg_countries),  # Rounded to integer
-        'Image_Path': company['Image_Path'] if pd.notnull(company['Image_Path']) else None
-    }
-    
-    return jsonify(details)
+@app.route('/api/company_wages/<path:company_name>')
+def company_wage_context(company_name):
+    context = company_wages.get(unquote(company_name))
+    if context is None:
+        return jsonify({"error": "Company not found"}), 404
+    return jsonify(context)
 
 @app.route('/api/company_names')
 def company_names():
     names = df['name'].tolist()
     return jsonify(names)
 
+@app.errorhandler(SingleFlightTimeout)
+def single_flight_timeout(error):
+    response = jsonify({"error": "Server busy computing this result, please retry"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @app.errorhandler(500)
 def internal_error(error):
     return jsonify({"error": "Internal Server Error"}), 500
 
+startup_profile.report(version=DATASET_VERSION)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5050, debug=True)
\ No newline at end of file
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from data_collection.gazetteer import resolve_cities
+
+# Zoom levels follow the web map convention: at zoom z the world is 2**z cells wide
+MIN_ZOOM = 0
+MAX_ZOOM = 12
+TOP_COMPANIES_PER_CELL = 5
+
+
+def load_company_points(city_locations_path, companies, gazetteer=None):
+    """Resolve each (company, city) row to coordinates, dropping cities we cannot place."""
+    locations = pd.read_csv(city_locations_path)
+    points = resolve_cities(locations, city_col='City', country_col='Country', gazetteer=gazetteer)
+    points = points.dropna(subset=['lat', 'lng']).drop_duplicates(['Company', 'lat', 'lng'])
+
+    followers = companies.drop_duplicates('name').set_index('name')['follower_count']
+    points['follower_count'] = points['Company'].map(followers).fillna(0)
+
+    return points[['Company', 'City', 'Country', 'lat', 'lng', 'follower_count']].reset_index(drop=True)
+
+
+def build_cluster_grid(points, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM, top_n=TOP_COMPANIES_PER_CELL):
+    """Precompute grid clusters for every zoom level.
+
+    Each zoom level buckets the points into square cells of 360 / 2**zoom degrees.
+    Per cell we keep the centroid, the number of locations, the number of distinct
+    companies and the top companies by follower count, so a request only has to
+    filter the cells of one level.
+    """
+    lat = points['lat'].to_numpy(dtype=np.float64)
+    lng = points['lng'].to_numpy(dtype=np.float64)
+    company_codes, company_names = pd.factorize(points['Company'])
+    company_followers = (pd.Series(points['follower_count'].to_numpy())
+                         .groupby(company_codes).max()
+                         .reindex(range(len(company_names)), fill_value=0)
+                         .to_numpy())
+    n_companies = max(len(company_names), 1)
+
+    grid = {}
+    for zoom in range(min_zoom, max_zoom + 1):
+        cell_size = 360.0 / (2 ** zoom)
+        cols = np.floor((lng + 180.0) / cell_size).astype(np.int64)
+        rows = np.floor((lat + 90.0) / cell_size).astype(np.int64)
+        cell_keys = rows * (2 ** zoom + 1) + cols
+
+        cells, cell_of_point = np.unique(cell_keys, return_inverse=True)
+        location_counts = np.bincount(cell_of_point, minlength=len(cells))
+        centroid_lat = np.bincount(cell_of_point, weights=lat, minlength=len(cells)) / location_counts
+        centroid_lng = np.bincount(cell_of_point, weights=lng, minlength=len(cells)) / location_counts
+
+        # Distinct (cell, company) pairs give company counts and the ranking input
+        pairs = np.unique(cell_of_point * n_companies + company_codes)
+        pair_cells = pairs // n_companies
+        pair_companies = pairs % n_companies
+        company_counts = np.bincount(pair_cells, minlength=len(cells))
+
+        order = np.lexsort((-company_followers[pair_companies], pair_cells))
+        starts = np.searchsorted(pair_cells[order], np.arange(len(cells)))
+        top_companies = [
+            company_names[pair_companies[order[start:start + min(top_n, count)]]].tolist()
+            for start, count in zip(starts, company_counts)
+        ]
+
+        grid[zoom] = {
+            'lat': centroid_lat,
+            'lng': centroid_lng,
+            'location_count': location_counts,
+            'company_count': company_counts,
+            'top_companies': top_companies
+        }
+
+    return grid
+
+
+def clamp_zoom(grid, zoom):
+    """The zoom level of the grid that serves a requested zoom."""
+    return int(min(max(zoom, min(grid)), max(grid)))
+
+
+def query_clusters(grid, zoom, bbox=None):
+    """Return the clusters of one zoom level, optionally limited to a bounding box.
+
+    bbox is (min_lng, min_lat, max_lng, max_lat).
+    """
+    level = grid[clamp_zoom(grid, zoom)]
+
+    mask = np.ones(len(level['lat']), dtype=bool)
+    if bbox is not None:
+        min_lng, min_lat, max_lng, max_lat = bbox
+        mask &= (level['lng'] >= min_lng) & (level['lng'] <= max_lng)
+        mask &= (level['lat'] >= min_lat) & (level['lat'] <= max_lat)
+
+    return [
+        {
+            'lat': round(float(level['lat'][i]), 5),
+            'lng': round(float(level['lng'][i]), 5),
+            'location_count': int(level['location_count'][i]),
+            'company_count': int(level['company_count'][i]),
+            'top_companies': level['top_companies'][i]
+        }
+        for i in np.flatnonzero(mask)
+    ]
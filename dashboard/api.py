@@ -0,0 +1,88 @@
+import os
+import json
+import time
+import threading
+import streamlit as st
+import requests
+from urllib.parse import quote
+
+API_URL = os.environ.get("AUSJOBS_API_URL", "https://ausjobs.onrender.com/api")
+
+# Set AUSJOBS_RECORD_SESSION=<file.jsonl> to log every backend call, per browser session,
+# for loadtest.py to replay
+RECORD_FILE = os.environ.get("AUSJOBS_RECORD_SESSION")
+record_lock = threading.Lock()
+
+def current_session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx else 'script'
+    except ImportError:
+        return 'script'
+
+def record_path(url, status=None):
+    entry = {
+        'session': current_session_id(),
+        'time': time.time(),
+        'path': url[len(API_URL):].lstrip('/'),
+        'status': status
+    }
+    with record_lock:
+        with open(RECORD_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+
+# Streamlit runs each browser session's script on its own thread, so each thread gets its
+# own requests.Session rather than sharing one across threads
+local = threading.local()
+
+def thread_session():
+    if not hasattr(local, 'session'):
+        local.session = requests.Session()
+    return local.session
+
+def get(url, **kwargs):
+    response = thread_session().get(url, **kwargs)
+    if RECORD_FILE:
+        record_path(response.url, response.status_code)
+    return response
+
+@st.cache_data
+def cached_fetch(endpoint):
+    return thread_session().get(f"{API_URL}/{endpoint}").json()
+
+def fetch_data(endpoint):
+    if RECORD_FILE:
+        # Recorded before the cache lookup, so calls the cache answers are part of the session too
+        record_path(f"{API_URL}/{endpoint}")
+    return cached_fetch(endpoint)
+
+def fetch_company_names():
+    response = get(f"{API_URL}/company_names")
+    return response.json()
+
+def fetch_company_details(company_name):
+    encoded_name = quote(company_name)
+    response = get(f"{API_URL}/company_details/{encoded_name}")
+    if response.status_code == 200:
+        return response.json()
+    else:
+        st.error(f"Error fetching company details: {response.text}")
+        return None
+
+def fetch_similar_companies(company_name, k=5):
+    encoded_name = quote(company_name)
+    response = get(f"{API_URL}/similar/{encoded_name}", params={'k': k})
+    if response.status_code == 200:
+        return response.json()['similar']
+    return []
+
+def logo_url(company_data, size=200):
+    """Versioned logo URL for a company_details response, or None if it has no logo."""
+    if company_data.get('logo_id') is None:
+        return None
+    url = f"{API_URL}/logo/{company_data['logo_id']}?size={size}&v={company_data['logo_version']}"
+    if RECORD_FILE:
+        # Loaded by the browser rather than through get(), but it is still a backend request
+        record_path(url)
+    return url
@@ -0,0 +1,136 @@
+import streamlit as st
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from dashboard.api import fetch_company_names, fetch_company_details, fetch_similar_companies, logo_url
+
+def plot_company_comparison(company_data):
+    # Create subplots
+    fig = make_subplots(rows=2, cols=2, subplot_titles=("Follower Count", "Company Size", "Founded Year", "Specialties and Countries"))
+
+    # Follower Count
+    fig.add_trace(go.Bar(x=['Company', 'Average'], 
+                         y=[company_data['follower_count'], company_data['avg_follower_count']],
+                         name='Follower Count'), row=1, col=1)
+
+    # Company Size
+    fig.add_trace(go.Bar(x=['Company', 'Average'], 
+                         y=[company_data['company_size'], company_data['avg_company_size']],
+                         name='Company Size'), row=1, col=2)
+
+    # Founded Year
+    fig.add_trace(go.Bar(x=['Company', 'Average'], 
+                         y=[company_data['founded_year'], company_data['avg_founded_year']],
+                         name='Founded Year'), row=2, col=1)
+
+    # Number of Specialties and Countries
+    fig.add_trace(go.Bar(x=['Specialties', 'Countries'], 
+                         y=[company_data['num_specialties'], company_data['num_countries']],
+                         name='Company'), row=2, col=2)
+    fig.add_trace(go.Bar(x=['Specialties', 'Countries'], 
+                         y=[company_data['avg_num_specialties'], company_data['avg_num_countries']],
+                         name='Average'), row=2, col=2)
+
+    # Update layout
+    fig.update_layout(height=700, width=1000, title_text="Company Comparison", showlegend=False)
+    fig.update_traces(marker_color='#636EFA', selector=dict(name='Company'))
+    fig.update_traces(marker_color='#EF553B', selector=dict(name='Average'))
+
+    return fig
+
+# Comparison baselines: label -> peer group returned by company_details (None = all companies)
+BASELINES = {
+    "All companies": None,
+    "Industry peers": 'industry',
+    "Size peers": 'size',
+    "Country peers": 'country'
+}
+
+def apply_baseline(company_data, group):
+    """Swap the global averages and percentiles for those of a peer group."""
+    peers = company_data.get('peers', {}).get(group) if group else None
+    if not peers:
+        return company_data, company_data.get('percentiles', {})
+
+    compared = dict(company_data)
+    for key, value in peers['averages'].items():
+        compared[f'avg_{key}'] = value
+    return compared, peers['percentiles']
+
+def company_comparison_page():
+    st.title("Company Comparison")
+    
+    company_names = fetch_company_names()
+    selected_company = st.selectbox("Select a company", company_names)
+    
+    if selected_company:
+        company_data = fetch_company_details(selected_company)
+        
+        if company_data:
+            col1, col2 = st.columns([1, 3])
+            
+            with col1:
+                logo = logo_url(company_data)
+                if logo:
+                    st.image(logo, width=200)
+                
+                st.subheader(company_data['name'])
+                st.write(f"Industry: {company_data.get('industry', 'N/A')}")
+                st.write(f"Website: {company_data.get('website', 'N/A')}")
+            
+            with col2:
+                description = company_data.get('description', '')
+                if description:
+                    if len(description) > 300:
+                        st.write(description[:300] + "...")
+                        if st.button('Read more'):
+                            st.write(description)
+                    else:
+                        st.write(description)
+                else:
+                    st.write("No description available.")
+            
+            baseline = st.radio("Compare against", list(BASELINES.keys()), horizontal=True)
+            group = BASELINES[baseline]
+            if group and group not in company_data.get('peers', {}):
+                st.info(f"No {baseline.lower()} available for this company; comparing against all companies.")
+            peer_info = company_data.get('peers', {}).get(group) if group else None
+            if peer_info:
+                st.caption(f"{baseline}: {peer_info['group']} ({peer_info['peer_count']} companies)")
+            company_data, percentiles = apply_baseline(company_data, group)
+
+            fig = plot_company_comparison(company_data)
+            st.plotly_chart(fig, use_container_width=True)
+            
+            metrics = [
+                ("Follower Count", 'follower_count', 'avg_follower_count'),
+                ("Company Size", 'company_size', 'avg_company_size'),
+                ("Founded Year", 'founded_year', 'avg_founded_year'),
+                ("Number of Specialties", 'num_specialties', 'avg_num_specialties'),
+                ("Number of Countries", 'num_countries', 'avg_num_countries')
+            ]
+            
+            cols = st.columns(len(metrics))
+            comparison_label = "average" if group is None else baseline.lower()
+            for col, (label, company_key, avg_key) in zip(cols, metrics):
+                company_value = company_data.get(company_key)
+                avg_value = company_data.get(avg_key)
+                if company_value is not None and avg_value is not None:
+                    diff = company_value - avg_value
+                    col.metric(
+                        label,
+                        f"{company_value:,}",
+                        f"{diff:+,.0f} compared to {comparison_label}"
+                    )
+                else:
+                    col.metric(label, "N/A", "N/A")
+                percentile = percentiles.get(company_key)
+                if percentile is not None:
+                    col.caption(f"Percentile: {percentile:.0f}")
+
+            similar_companies = fetch_similar_companies(selected_company)
+            if similar_companies:
+                st.subheader("Similar companies")
+                for similar in similar_companies:
+                    st.write(f"{similar['name']} ({similar.get('industry') or 'N/A'}): {similar['similarity']:.0%} similar")
+        else:
+            st.error("Failed to fetch company details. Please try again.")
@@ -0,0 +1,39 @@
+import streamlit as st
+import plotly.express as px
+import pandas as pd
+from dashboard.api import fetch_data
+
+def plot_top_companies_by_followers():
+    data = fetch_data("top_k?metric=follower_count&k=10")
+    
+    if not data or not data.get('results'):
+        st.error("Failed to fetch top companies by followers data.")
+        return
+
+    df = pd.DataFrame(data['results'])
+    
+    # Create the bar chart
+    fig = px.bar(
+        df,
+        x='name',
+        y='follower_count',
+        title="Top Companies by LinkedIn Follower Count",
+        labels={'name': 'Company Name', 'follower_count': 'Follower Count'},
+        hover_data=['industry']
+    )
+    
+    fig.update_layout(
+        height=600,
+        xaxis_title="Company",
+        yaxis_title="Follower Count",
+        xaxis={'categoryorder':'total descending'}
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Display statistics
+    st.subheader("Top 10 Companies by Follower Count")
+    for _, row in df.head(10).iterrows():
+        st.write(f"{row['name']}: {row['follower_count']:,} followers")
+
+    st.write(f"Average follower count: {df['follower_count'].mean():,.0f}")
@@ -0,0 +1,84 @@
+import streamlit as st
+import plotly.express as px
+import pandas as pd
+from urllib.parse import urlencode
+from dashboard.api import fetch_data
+
+# Company Size Distribution
+def plot_company_size_distribution():
+    data = fetch_data("company_size_distribution")
+    
+    categories = list(data.keys())
+    values = list(data.values())
+    
+    color_map = {
+        "Micro (< 30)": "#FFA07A",
+        "Small (30-99)": "#98FB98",
+        "Medium (100-499)": "#87CEFA",
+        "Large (500+)": "#DDA0DD"
+    }
+    
+    fig = px.pie(
+        values=values,
+        names=categories,
+        title="Company Size Distribution",
+        color=categories,
+        color_discrete_map=color_map
+    )
+    
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    fig.update_layout(
+        height=600,
+        legend_title_text='Company Size',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+
+# Industry Breakdown
+def plot_industry_breakdown():
+    data = fetch_data("industry_breakdown")
+    fig = px.treemap(names=list(data.keys()), parents=[""] * len(data), values=list(data.values()), title="Industry Breakdown")
+    fig.update_layout(height=600)
+    st.plotly_chart(fig, use_container_width=True)
+
+# Founded Year Timeline
+def plot_founded_year_timeline():
+    industries = list(fetch_data("industry_breakdown").keys())
+    selected = st.multiselect("Industries", industries, placeholder="All industries")
+    series = st.radio("Show", ["Founded per year", "Cumulative", "Growth (%)"], horizontal=True)
+
+    endpoint = "founded_year_timeline"
+    if selected:
+        # One parameter per industry, since industry names can contain commas
+        endpoint += "?" + urlencode({'industry': selected}, doseq=True)
+    data = fetch_data(endpoint)
+
+    values = {"Founded per year": data['counts'], "Cumulative": data['cumulative'], "Growth (%)": data['growth']}[series]
+    fig = px.line(x=data['years'], y=values, title="Companies Founded by Year", labels={'x': 'Year', 'y': series})
+    fig.update_layout(height=600)
+    st.plotly_chart(fig, use_container_width=True)
+
+# Company Type Distribution
+def plot_company_type_distribution():
+    data = fetch_data("company_type_distribution")
+    fig = px.pie(values=list(data.values()), names=list(data.keys()), title="Company Type Distribution")
+    fig.update_layout(height=600)
+    st.plotly_chart(fig, use_container_width=True)
+
+# Funding Analysis
+def plot_funding_analysis():
+    data = fetch_data("funding_analysis")
+    df = pd.DataFrame(data)
+    fig = px.scatter(df, x='extra_number_of_funding_rounds', y='extra_total_funding_amount', 
+                     hover_name='name', title="Funding Analysis")
+    fig.update_layout(height=600)
+    st.plotly_chart(fig, use_container_width=True)
+
+# Employee Count vs Follower Count
+def plot_employee_follower_correlation():
+    data = fetch_data("employee_follower_correlation")
+    df = pd.DataFrame(data)
+    fig = px.scatter(df, x='company_size', y='follower_count', title="Employee Count vs Follower Count")
+    fig.update_layout(height=600)
+    st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,36 @@
+import streamlit as st
+import plotly.express as px
+from wordcloud import WordCloud
+import matplotlib.pyplot as plt
+from dashboard.api import fetch_data
+
+# Specialties Word Cloud
+def plot_specialties_wordcloud():
+    data = fetch_data("specialties_wordcloud")
+    
+    if not data:
+        st.warning("No specialty data available.")
+        return
+    
+    wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(data)
+    
+    plt.figure(figsize=(10, 5))
+    plt.imshow(wordcloud, interpolation='bilinear')
+    plt.axis('off')
+    plt.title('Specialties Word Cloud')
+    
+    st.pyplot(plt.gcf())
+    
+    top_20 = dict(sorted(data.items(), key=lambda x: x[1], reverse=True)[:20])
+    
+    fig = px.bar(
+        x=list(top_20.values()),
+        y=list(top_20.keys()),
+        orientation='h',
+        labels={'x': 'Frequency', 'y': 'Specialty'},
+        title="Top 20 Specialties"
+    )
+    
+    fig.update_layout(height=600)
+    
+    st.plotly_chart(fig, use_container_width=True)
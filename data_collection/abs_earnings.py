@@ -0,0 +1,143 @@
+import os
+import re
+import glob
+import hashlib
+import argparse
+import pandas as pd
+import openpyxl
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+ABS_DIR = os.path.join(DATA_DIR, 'ABS')
+OUTPUT_FILE = os.path.join(DATA_DIR, 'processed_data', 'abs_earnings.parquet')
+MAX_WORKERS = 4
+
+TIDY_COLUMNS = ['period', 'dimension', 'category', 'measure', 'value', 'source_file', 'source_hash']
+
+# ABS state abbreviations -> the full names used for company headquarters
+STATE_NAMES = {
+    'NSW': 'New South Wales',
+    'Vic.': 'Victoria',
+    'Qld': 'Queensland',
+    'SA': 'South Australia',
+    'WA': 'Western Australia',
+    'Tas.': 'Tasmania',
+    'NT': 'Northern Territory',
+    'ACT': 'Australian Capital Territory',
+    'Aust.': 'Australia'
+}
+
+MONTHS = {month: number for number, month in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+PERIOD_PATTERN = re.compile(r'\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s*(\d{4})', re.IGNORECASE)
+
+
+def file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def find_period(rows: List[tuple], path: str) -> str:
+    """Reference period as YYYY-MM, from the ABS source note, the headers or the file name."""
+    texts = [str(value) for row in reversed(rows) for value in row if isinstance(value, str)]
+    for text in texts + [os.path.basename(path)]:
+        match = PERIOD_PATTERN.search(text)
+        if match:
+            return f"{match.group(2)}-{MONTHS[match.group(1)[:3].lower()]:02d}"
+    # File names like "2021Average weekly earnings..." carry only the year; ABS publishes May figures
+    match = re.match(r'(\d{4})', os.path.basename(path))
+    if match:
+        return f"{match.group(1)}-05"
+    raise ValueError(f"No reference period found in {path}")
+
+
+def _measure(header: Any) -> str:
+    return re.sub(r'\s*\(\$\)\s*$', '', str(header)).strip()
+
+
+def parse_workbook(path: str) -> List[Dict[str, Any]]:
+    """Tidy rows from one ABS Average Weekly Earnings workbook, whatever its layout.
+
+    Handles the three layouts in data/ABS: by state and by industry (one row per
+    category, one column per Persons/Males/Females) and by sector (sector in the first
+    column, earnings measure in the second, $ level then % change).
+    """
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    rows = [row for row in workbook.worksheets[0].iter_rows(values_only=True)]
+    workbook.close()
+
+    title = str(rows[0][0]).lower()
+    period = find_period(rows, path)
+    source = {'source_file': os.path.basename(path), 'source_hash': file_hash(path)}
+    tidy = []
+
+    if 'by sector' in title:
+        sector = None
+        for row in rows[1:]:
+            if row[0]:
+                sector = str(row[0]).strip()
+            if sector and len(row) > 2 and isinstance(row[2], (int, float)) and row[1]:
+                tidy.append({'period': period, 'dimension': 'sector', 'category': sector,
+                             'measure': str(row[1]).strip(), 'value': float(row[2]), **source})
+    else:
+        dimension = 'industry' if 'by industry' in title else 'state'
+        header_index = next(i for i, row in enumerate(rows) if any('($)' in str(value) for value in row if value))
+        measures = [_measure(value) if value else None for value in rows[header_index]]
+        for row in rows[header_index + 1:]:
+            if not row[0]:
+                continue
+            category = str(row[0]).strip()
+            if dimension == 'state':
+                category = STATE_NAMES.get(category, category)
+            for measure, value in zip(measures[1:], row[1:]):
+                if measure and isinstance(value, (int, float)):
+                    tidy.append({'period': period, 'dimension': dimension, 'category': category,
+                                 'measure': measure, 'value': float(value), **source})
+    return tidy
+
+
+def ingest(abs_dir: str = ABS_DIR, output_file: str = OUTPUT_FILE, workers: int = MAX_WORKERS,
+           force: bool = False) -> pd.DataFrame:
+    """Parse every workbook into the tidy earnings table, reusing rows of files whose hash is unchanged."""
+    paths = sorted(glob.glob(os.path.join(abs_dir, '*.xlsx')))
+    hashes = {os.path.basename(path): file_hash(path) for path in paths}
+
+    previous = pd.DataFrame(columns=TIDY_COLUMNS)
+    if os.path.exists(output_file) and not force:
+        previous = pd.read_parquet(output_file)
+    unchanged = {name for name, digest in previous.groupby('source_file')['source_hash'].first().items()
+                 if hashes.get(name) == digest}
+    todo = [path for path in paths if os.path.basename(path) not in unchanged]
+
+    if workers > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = list(executor.map(parse_workbook, todo))
+    else:
+        parsed = [parse_workbook(path) for path in todo]
+
+    kept = previous[previous['source_file'].isin(unchanged)]
+    fresh = pd.DataFrame([row for rows in parsed for row in rows], columns=TIDY_COLUMNS)
+    earnings = (pd.concat([kept, fresh], ignore_index=True) if len(kept) else fresh)
+    earnings = earnings.sort_values(['dimension', 'category', 'measure', 'period']).reset_index(drop=True)
+
+    if todo or len(kept) != len(previous):
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        earnings.to_parquet(output_file, index=False)
+    print(f"Parsed {len(todo)} of {len(paths)} workbooks ({len(unchanged)} unchanged); {len(earnings)} rows in {output_file}")
+    return earnings
+
+
+def load_earnings(path: Optional[str] = OUTPUT_FILE) -> pd.DataFrame:
+    """The tidy earnings table, built in-process from the workbooks if it has not been ingested yet."""
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    return ingest(output_file=path, workers=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest ABS Average Weekly Earnings workbooks into one tidy table.")
+    parser.add_argument('--force', action='store_true', help="Re-parse every workbook, even unchanged ones")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+    ingest(workers=args.workers, force=args.force)
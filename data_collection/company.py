@@ -4,13 +4,21 @@ import time
 import logging
 import random
 import json
-from openpyxl.utils import get_column_letter
+import argparse
+import threading
+import pandas as pd
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 import os
+from rate_limit import TokenBucket
+from crawl_state import CrawlState
+from http_cache import CachedSession
+from profile_schema import normalize_profiles, workbook_json_columns, write_tables
 
 # Set up logging
 logging.basicConfig(filename='company_info_extraction.log', level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+                    format='%(asctime)s - %(levelname)s - %(threadName)s - %(message)s')
 
 # Load environment variables
 load_dotenv()
@@ -19,22 +27,23 @@ load_dotenv()
 LOOKUP_ENDPOINT = "https://nubela.co/proxycurl/api/linkedin/company/resolve"
 PROFILE_ENDPOINT = "https://nubela.co/proxycurl/api/linkedin/company"
 PROXYCURL_API = os.getenv("PROXYCURL_API")
-logging.info(f"API Key: {PROXYCURL_API[:5]}...")  # Log first 5 characters of API key for verification
 
-# Rate limiting variables
-RATE_LIMIT = 2  # requests per minute
+# Input and output files
+INPUT_FILE = 'busa3021.xlsx'
+OUTPUT_LOG = 'company_information_full.jsonl'  # one JSON record per company, append-only
+OUTPUT_FILE = 'company_information_full.xlsx'
+OUTPUT_TABLES_DIR = 'company_tables'  # typed company table and child tables as Parquet
+
+# Rate limiting: set PROXYCURL_RATE_LIMIT to the requests per minute your plan allows
+RATE_LIMIT = int(os.getenv("PROXYCURL_RATE_LIMIT", 2))  # requests per minute
 RATE_LIMIT_PERIOD = 60  # seconds
-last_request_time = 0
-
-def wait_for_rate_limit():
-    global last_request_time
-    current_time = time.time()
-    time_since_last_request = current_time - last_request_time
-    if time_since_last_request < RATE_LIMIT_PERIOD / RATE_LIMIT:
-        sleep_time = (RATE_LIMIT_PERIOD / RATE_LIMIT) - time_since_last_request
-        logging.info(f"Waiting for {sleep_time:.2f} seconds to respect rate limit")
-        time.sleep(sleep_time)
-    last_request_time = time.time()
+MAX_WORKERS = int(os.getenv("PROXYCURL_WORKERS", 8))
+
+# Shared by every worker, so concurrency never exceeds the account quota.
+# Only requests that miss the HTTP cache take a token.
+rate_limiter = TokenBucket(RATE_LIMIT, period=RATE_LIMIT_PERIOD)
+session = CachedSession(throttle=rate_limiter.acquire)
+output_lock = threading.Lock()
 
 def exponential_backoff(attempt, max_delay=300):
     delay = min(60 * (2 ** attempt) + random.uniform(0, 1), max_delay)
@@ -43,15 +52,17 @@ def exponential_backoff(attempt, max_delay=300):
 
 def make_api_request(url, headers, params, max_retries=3):
     for attempt in range(max_retries):
-        wait_for_rate_limit()
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = session.get(url, headers=headers, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.HTTPError as e:
             if response.status_code == 429:
                 logging.warning(f"Rate limit reached. Attempt {attempt + 1} of {max_retries}")
                 exponential_backoff(attempt)
+            elif response.status_code == 404:
+                # A definitive answer, unlike the failures below
+                return {}
             else:
                 logging.error(f"HTTP error occurred: {str(e)}")
                 return None
@@ -62,13 +73,14 @@ def make_api_request(url, headers, params, max_retries=3):
     return None
 
 def lookup_company_url(company_name):
+    """Returns (url, resolved): resolved is False when the lookup itself failed and may be retried."""
     headers = {'Authorization': f'Bearer {PROXYCURL_API}'}
     params = {'company_name': company_name, 'enrich_profile': 'false'}
-    
+
     result = make_api_request(LOOKUP_ENDPOINT, headers, params)
-    if result:
-        return result.get('url')
-    return None
+    if result is None:
+        return None, False
+    return result.get('url'), True
 
 def get_company_info(company_url):
     headers = {'Authorization': f'Bearer {PROXYCURL_API}'}
@@ -82,78 +94,129 @@ def get_company_info(company_url):
         'use_cache': 'if-present',
         'fallback_to_cache': 'on-error'
     }
-    
-    return make_api_request(PROFILE_ENDPOINT, headers, params)
 
-def flatten_dict(d, parent_key='', sep='_'):
-    items = []
-    for k, v in d.items():
-        new_key = f"{parent_key}{sep}{k}" if parent_key else k
-        if isinstance(v, dict):
-            items.extend(flatten_dict(v, new_key, sep=sep).items())
-        elif isinstance(v, list):
-            items.append((new_key, json.dumps(v)))
-        else:
-            items.append((new_key, str(v)))
-    return dict(items)
-
-# Read company names from the input Excel file
-input_workbook = openpyxl.load_workbook('busa3021.xlsx')
-input_sheet = input_workbook['Sheet2']
-
-company_names = [cell.value for cell in input_sheet['A'][1:] if cell.value]  # Assuming company names are in column A
+    return make_api_request(PROFILE_ENDPOINT, headers, params)
 
-# Create a new workbook for output
-output_workbook = openpyxl.Workbook()
-output_sheet = output_workbook.active
-output_sheet.title = "Company Information"
+URL_NOT_FOUND = "URL not found"
 
-# Initialize headers
-headers = ["Company Name", "LinkedIn URL", "Status", "Error Details"]
-header_row = 1
-for col, header in enumerate(headers, start=1):
-    output_sheet.cell(row=header_row, column=col, value=header)
+def process_company(company_name, known_url=None):
+    """Resolve and fetch one company, returning the record to append to the log.
 
-# Process companies and update Excel file in real-time
-for row, company_name in enumerate(company_names, start=2):
+    known_url skips the lookup call when a previous run already resolved the company.
+    """
     logging.info(f"Processing: {company_name}")
-    
-    output_sheet.cell(row=row, column=1, value=company_name)
-    
-    company_url = lookup_company_url(company_name)
-    if not company_url:
+    record = {'company_name': company_name, 'linkedin_url': None, 'status': None,
+              'error': None, 'profile': None}
+
+    company_url, resolved = (known_url, True) if known_url else lookup_company_url(company_name)
+    if not resolved:
+        logging.error(f"LinkedIn URL lookup failed for {company_name}")
+        record.update(status="Lookup failed", error="API request failed or returned no data")
+    elif not company_url:
         logging.error(f"Could not find LinkedIn URL for {company_name}")
-        output_sheet.cell(row=row, column=3, value="URL not found")
-        output_sheet.cell(row=row, column=4, value="Company LinkedIn profile not found")
-        output_workbook.save('company_information_full.xlsx')
-        continue
-    
-    output_sheet.cell(row=row, column=2, value=company_url)
-    
-    company_info = get_company_info(company_url)
-    
-    if company_info:
-        flattened_info = flatten_dict(company_info)
-        output_sheet.cell(row=row, column=3, value="Data fetched successfully")
-        
-        # Dynamically add new columns for each piece of data
-        for key, value in flattened_info.items():
-            if key not in headers:
-                headers.append(key)
-                col = len(headers)
-                output_sheet.cell(row=header_row, column=col, value=key)
-            else:
-                col = headers.index(key) + 1
-            
-            output_sheet.cell(row=row, column=col, value=value)
+        record.update(status=URL_NOT_FOUND, error="Company LinkedIn profile not found")
     else:
-        logging.error(f"Could not fetch information for {company_name}")
-        output_sheet.cell(row=row, column=3, value="Data fetch failed")
-        output_sheet.cell(row=row, column=4, value="API request failed or returned no data")
-    
-    # Save after each company
-    output_workbook.save('company_information_full.xlsx')
-    logging.info(f"Updated information for {company_name}")
-
-logging.info("Process completed. Final results saved in 'company_information_full.xlsx'")
-print("Process completed. Check 'company_information_full.xlsx' for results and 'company_info_extraction.log' for details.")
\ No newline at end of file
+        record['linkedin_url'] = company_url
+        company_info = get_company_info(company_url)
+        if company_info:
+            record.update(status="Data fetched successfully", profile=company_info)
+        else:
+            logging.error(f"Could not fetch information for {company_name}")
+            record.update(status="Data fetch failed", error="API request failed or returned no data")
+
+    record['fetched_at'] = datetime.now(timezone.utc).isoformat()
+    return record
+
+def append_record(record, log_path=OUTPUT_LOG):
+    # Appending one line per company keeps the cost of saving constant as the crawl grows
+    with output_lock:
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+
+def read_records(log_path=OUTPUT_LOG):
+    """Latest record per company from the append-only log."""
+    records = {}
+    if os.path.exists(log_path):
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record['company_name']] = record
+    return records
+
+# Headers the manual cleaning step and logos.py expect for the collector fields
+OUTPUT_HEADERS = {
+    'company_name': "Company Name",
+    'linkedin_url': "LinkedIn URL",
+    'status': "Status",
+    'error': "Error Details"
+}
+
+def build_output_table(company_names, log_path=OUTPUT_LOG, output_path=OUTPUT_FILE, tables_dir=OUTPUT_TABLES_DIR):
+    """Build the typed company table and its child tables once, from the log, in input order,
+    and the workbook: the company table's columns plus the list fields as JSON text.
+
+    company_id is the row position in the output workbook, the same id logos.py uses.
+    """
+    records = read_records(log_path)
+    ordered = [records[name] for name in company_names if name in records]
+    tables = normalize_profiles(
+        dict(record, company_id=company_id) for company_id, record in enumerate(ordered)
+    )
+    write_tables(tables, tables_dir)
+
+    # The workbook keeps the list fields as JSON columns for the cleaning step and the API
+    workbook = pd.concat([tables['companies'].rename(columns=OUTPUT_HEADERS), workbook_json_columns(ordered)], axis=1)
+    workbook.to_excel(output_path, index=False, sheet_name="Company Information")
+    return len(ordered)
+
+def main(refresh_older_than_days=None, input_file=INPUT_FILE):
+    logging.info(f"API Key: {PROXYCURL_API[:5]}...")  # Log first 5 characters of API key for verification
+
+    # Read company names from the input Excel file
+    input_workbook = openpyxl.load_workbook(input_file)
+    input_sheet = input_workbook['Sheet2']
+    company_names = [cell.value for cell in input_sheet['A'][1:] if cell.value]  # Assuming company names are in column A
+
+    # Skip companies finished by earlier runs; retry failures once their backoff has passed
+    state = CrawlState('profile')
+    max_age = refresh_older_than_days * 86400 if refresh_older_than_days is not None else None
+    todo = state.pending(company_names, max_age=max_age)
+    known = state.all()
+    logging.info(f"{len(todo)} of {len(company_names)} companies need fetching")
+
+    # Lookups and profile fetches run concurrently; the token bucket sets the pace
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        future_to_company = {
+            executor.submit(process_company, name, known.get(name, {}).get('linkedin_url')): name
+            for name in todo
+        }
+        for future in as_completed(future_to_company):
+            company_name = future_to_company[future]
+            try:
+                record = future.result()
+                append_record(record)
+                if record['profile']:
+                    changed = state.mark_done(company_name, record['linkedin_url'], record['profile'])
+                    logging.info(f"Updated information for {company_name} ({'changed' if changed else 'unchanged'})")
+                elif record['status'] == URL_NOT_FOUND:
+                    state.mark_not_found(company_name, record['error'])
+                else:
+                    state.mark_failed(company_name, record['error'], record['linkedin_url'])
+            except Exception as exc:
+                logging.error(f"{company_name} generated an exception: {exc}")
+                state.mark_failed(company_name, str(exc))
+
+    logging.info(f"Crawl state: {state.summary()}")
+
+    row_count = build_output_table(company_names)
+    logging.info(f"Process completed. {row_count} companies saved in '{OUTPUT_FILE}' and '{OUTPUT_TABLES_DIR}/'")
+    print(f"Process completed. Check '{OUTPUT_FILE}' for results and 'company_info_extraction.log' for details.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch LinkedIn company profiles from ProxyCurl.")
+    parser.add_argument('--refresh-older-than', type=float, metavar='DAYS',
+                        help="Also re-fetch companies whose data is older than DAYS")
+    parser.add_argument('--input', default=INPUT_FILE, help="Workbook with the company names (Sheet2, column A)")
+    args = parser.parse_args()
+    main(refresh_older_than_days=args.refresh_older_than, input_file=args.input)
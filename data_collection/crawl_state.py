@@ -0,0 +1,155 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+CRAWL_STATE_DB = 'crawl_state.sqlite'
+
+# Failed companies are retried after RETRY_BASE_DELAY * 2 ** (attempts - 1) seconds,
+# and given up on after MAX_ATTEMPTS
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 60
+
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+# A definitive "no such company" answer; retrying would only spend lookup credits again
+STATUS_NOT_FOUND = 'not_found'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_state (
+    stage TEXT NOT NULL,
+    company TEXT NOT NULL,
+    linkedin_url TEXT,
+    status TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    fetched_at REAL,
+    next_attempt_at REAL,
+    content_hash TEXT,
+    output TEXT,
+    PRIMARY KEY (stage, company)
+)
+"""
+
+
+def content_hash(content: Any) -> Optional[str]:
+    """Stable hash of a fetched payload (bytes or anything JSON-serializable)."""
+    if content is None:
+        return None
+    if not isinstance(content, bytes):
+        content = json.dumps(content, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+class CrawlState:
+    """Per-company fetch status for one collector stage (e.g. 'profile' or 'logo').
+
+    Lets a crashed or repeated run skip work that already succeeded, retry only
+    failures (with exponential backoff), and refresh records older than a given age.
+    """
+
+    def __init__(self, stage: str, path: str = CRAWL_STATE_DB):
+        self.stage = stage
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute(SCHEMA)
+
+    def get(self, company: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM crawl_state WHERE stage = ? AND company = ?", (self.stage, company)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM crawl_state WHERE stage = ?", (self.stage,)).fetchall()
+        return {row['company']: dict(row) for row in rows}
+
+    def pending(self, companies: Iterable[str], max_age: Optional[float] = None,
+                now: Optional[float] = None) -> List[str]:
+        """Companies that still need fetching.
+
+        Finished companies are skipped unless max_age (seconds) is given and their
+        data is older than that. Failed companies come back once their backoff has
+        elapsed, until MAX_ATTEMPTS is reached. Companies marked not found never do.
+        """
+        now = now or time.time()
+        known = self.all()
+        todo = []
+        for company in companies:
+            row = known.get(company)
+            if row is None:
+                todo.append(company)
+            elif row['status'] == STATUS_DONE:
+                if max_age is not None and (row['fetched_at'] or 0) < now - max_age:
+                    todo.append(company)
+            elif row['status'] == STATUS_NOT_FOUND:
+                continue
+            elif row['attempts'] < MAX_ATTEMPTS and (row['next_attempt_at'] or 0) <= now:
+                todo.append(company)
+        return todo
+
+    def mark_done(self, company: str, linkedin_url: Optional[str] = None,
+                  content: Any = None, output: Optional[str] = None) -> bool:
+        """Record a successful fetch. Returns True if the content changed since last time."""
+        new_hash = content_hash(content)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT content_hash FROM crawl_state WHERE stage = ? AND company = ?", (self.stage, company)
+            ).fetchone()
+            self._conn.execute(
+                """INSERT INTO crawl_state (stage, company, linkedin_url, status, attempts, last_error,
+                                            fetched_at, next_attempt_at, content_hash, output)
+                   VALUES (?, ?, ?, ?, 0, NULL, ?, NULL, ?, ?)
+                   ON CONFLICT (stage, company) DO UPDATE SET
+                       linkedin_url = COALESCE(excluded.linkedin_url, linkedin_url),
+                       status = excluded.status, attempts = 0, last_error = NULL,
+                       fetched_at = excluded.fetched_at, next_attempt_at = NULL,
+                       content_hash = excluded.content_hash, output = excluded.output""",
+                (self.stage, company, linkedin_url, STATUS_DONE, time.time(), new_hash, output)
+            )
+        return row is None or row['content_hash'] != new_hash
+
+    def mark_failed(self, company: str, error: str, linkedin_url: Optional[str] = None):
+        """Record a failed fetch and schedule the next retry."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT attempts FROM crawl_state WHERE stage = ? AND company = ?", (self.stage, company)
+            ).fetchone()
+            attempts = (row['attempts'] if row else 0) + 1
+            self._conn.execute(
+                """INSERT INTO crawl_state (stage, company, linkedin_url, status, attempts, last_error,
+                                            fetched_at, next_attempt_at)
+                   VALUES (?, ?, ?, ?, ?, ?, NULL, ?)
+                   ON CONFLICT (stage, company) DO UPDATE SET
+                       linkedin_url = COALESCE(excluded.linkedin_url, linkedin_url),
+                       status = excluded.status, attempts = excluded.attempts,
+                       last_error = excluded.last_error, next_attempt_at = excluded.next_attempt_at""",
+                (self.stage, company, linkedin_url, STATUS_FAILED, attempts, error,
+                 now + RETRY_BASE_DELAY * 2 ** (attempts - 1))
+            )
+
+    def mark_not_found(self, company: str, error: str):
+        """Record that the company definitively does not exist upstream; it is not retried."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO crawl_state (stage, company, status, attempts, last_error, fetched_at, next_attempt_at)
+                   VALUES (?, ?, ?, 0, ?, ?, NULL)
+                   ON CONFLICT (stage, company) DO UPDATE SET
+                       status = excluded.status, attempts = 0, last_error = excluded.last_error,
+                       fetched_at = excluded.fetched_at, next_attempt_at = NULL""",
+                (self.stage, company, STATUS_NOT_FOUND, error, time.time())
+            )
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS n FROM crawl_state WHERE stage = ? GROUP BY status", (self.stage,)
+            ).fetchall()
+        return {row['status']: row['n'] for row in rows}
@@ -1,20 +1,111 @@
 import pandas as pd
-import requests
 import csv
 import os
+import time
+import json
+import argparse
+import requests
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from http_cache import CachedSession
+from rate_limit import TokenBucket, AdaptiveConcurrency
+from symbol_master import build_symbol_index, match_companies
 
 API_KEY = "YOUR FMP API KEY"
 BASE_URL = "https://financialmodelingprep.com/api/v3"
 
+# Statements merged into one wide row per (symbol, date, period)
+STATEMENTS = ["income-statement", "balance-sheet-statement", "cash-flow-statement"]
+START_YEAR = 2021
+PERIOD = "annual"
+
+# Output schema, fixed up front so rows can be written as soon as each company finishes.
+# Fields outside this list are dropped.
+ID_COLUMNS = [
+    'company_name', 'matched_name', 'symbol', 'exchange', 'currency', 'date', 'period',
+    'calendarYear', 'reportedCurrency', 'cik', 'fillingDate', 'acceptedDate', 'link', 'finalLink', 'error'
+]
+STATEMENT_COLUMNS = [
+    'accountPayables', 'accountsPayables', 'accountsReceivables',
+    'accumulatedOtherComprehensiveIncomeLoss', 'acquisitionsNet', 'capitalExpenditure',
+    'capitalLeaseObligations', 'cashAndCashEquivalents', 'cashAndShortTermInvestments',
+    'cashAtBeginningOfPeriod', 'cashAtEndOfPeriod', 'changeInWorkingCapital', 'commonStock',
+    'commonStockIssued', 'commonStockRepurchased', 'costAndExpenses', 'costOfRevenue', 'debtRepayment',
+    'deferredIncomeTax', 'deferredRevenue', 'deferredRevenueNonCurrent',
+    'deferredTaxLiabilitiesNonCurrent', 'depreciationAndAmortization', 'dividendsPaid', 'ebitda',
+    'ebitdaratio', 'effectOfForexChangesOnCash', 'eps', 'epsdiluted', 'freeCashFlow',
+    'generalAndAdministrativeExpenses', 'goodwill', 'goodwillAndIntangibleAssets', 'grossProfit',
+    'grossProfitRatio', 'incomeBeforeTax', 'incomeBeforeTaxRatio', 'incomeTaxExpense',
+    'intangibleAssets', 'interestExpense', 'interestIncome', 'inventory',
+    'investmentsInPropertyPlantAndEquipment', 'longTermDebt', 'longTermInvestments', 'minorityInterest',
+    'netCashProvidedByOperatingActivities', 'netCashUsedForInvestingActivites',
+    'netCashUsedProvidedByFinancingActivities', 'netChangeInCash', 'netDebt', 'netIncome',
+    'netIncomeRatio', 'netReceivables', 'operatingCashFlow', 'operatingExpenses', 'operatingIncome',
+    'operatingIncomeRatio', 'otherAssets', 'otherCurrentAssets', 'otherCurrentLiabilities',
+    'otherExpenses', 'otherFinancingActivites', 'otherInvestingActivites', 'otherLiabilities',
+    'otherNonCashItems', 'otherNonCurrentAssets', 'otherNonCurrentLiabilities', 'otherWorkingCapital',
+    'othertotalStockholdersEquity', 'preferredStock', 'propertyPlantEquipmentNet',
+    'purchasesOfInvestments', 'researchAndDevelopmentExpenses', 'retainedEarnings', 'revenue',
+    'salesMaturitiesOfInvestments', 'sellingAndMarketingExpenses',
+    'sellingGeneralAndAdministrativeExpenses', 'shortTermDebt', 'shortTermInvestments',
+    'stockBasedCompensation', 'taxAssets', 'taxPayables', 'totalAssets', 'totalCurrentAssets',
+    'totalCurrentLiabilities', 'totalDebt', 'totalEquity', 'totalInvestments', 'totalLiabilities',
+    'totalLiabilitiesAndStockholdersEquity', 'totalLiabilitiesAndTotalEquity', 'totalNonCurrentAssets',
+    'totalNonCurrentLiabilities', 'totalOtherIncomeExpensesNet', 'totalStockholdersEquity',
+    'weightedAverageShsOut', 'weightedAverageShsOutDil'
+]
+OUTPUT_COLUMNS = ID_COLUMNS + STATEMENT_COLUMNS
+
+# Snapshot of the FMP stock list, downloaded once and matched against locally
+SYMBOL_MASTER_FILE = "stock_list.json"
+
+# Ambiguous local matches, one row per candidate. Set accept to "yes" on the right row and
+# the next run uses that symbol; nothing on the list is fetched until then.
+SYMBOL_REVIEW_FILE = "symbol_review.csv"
+REVIEW_COLUMNS = ['company_name', 'matched_name', 'symbol', 'exchange', 'match_score', 'accept']
+
 # Prioritized list of stock exchanges
 PREFERRED_EXCHANGES = ["NASDAQ", "NYSE", "TSX", "TSXV", "LSE", "ASX", "PNK"]
 
 # Rate limiting
 MAX_CALLS_PER_MINUTE = 300
-CALL_INTERVAL = 60 / MAX_CALLS_PER_MINUTE
+MAX_WORKERS = 30
+
+# Companies whose calls were throttled or failed are retried in later rounds
+MAX_RETRY_ROUNDS = 5
+RETRY_DELAY = 10  # seconds, doubled every round
+
+class RetryableError(Exception):
+    """A call was throttled (429), hit a server error or failed on the network."""
+
+def create_session() -> CachedSession:
+    """One pooled session shared by all workers, behind the HTTP cache and the rate limiter."""
+    pooled = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS)
+    pooled.mount("https://", adapter)
+    pooled.mount("http://", adapter)
+    # Searches and statements are answered from the on-disk HTTP cache on re-runs
+    return CachedSession(pooled, throttle=rate_limiter.acquire)
+
+rate_limiter = TokenBucket(MAX_CALLS_PER_MINUTE)
+concurrency = AdaptiveConcurrency(initial=8, maximum=MAX_WORKERS)
+session = create_session()
+
+def fmp_get(endpoint: str) -> requests.Response:
+    """GET an FMP endpoint, adapting concurrency to how the API responds."""
+    concurrency.acquire()
+    try:
+        response = session.get(endpoint, timeout=30)
+    except requests.exceptions.RequestException as exc:
+        concurrency.release(success=False)
+        raise RetryableError(str(exc))
+    if response.status_code == 429 or response.status_code >= 500:
+        concurrency.release(success=False)
+        raise RetryableError(f"Status code {response.status_code} from {endpoint.split('?')[0]}")
+    concurrency.release(success=True)
+    return response
 
 def read_excel_file(file_path: str) -> List[str]:
     """Read company names from an Excel file."""
@@ -24,30 +115,78 @@ def read_excel_file(file_path: str) -> List[str]:
 def search_company(company_name: str) -> List[Dict[str, Any]]:
     """Search for a company using the FMP API."""
     endpoint = f"{BASE_URL}/search?query={company_name}&limit=10&apikey={API_KEY}"
-    response = requests.get(endpoint)
+    response = fmp_get(endpoint)
     if response.status_code == 200:
         return response.json()
     print(f"Error searching for {company_name}: Status code {response.status_code}")
     return []
 
+def load_stock_list(path: str = SYMBOL_MASTER_FILE, refresh: bool = False) -> List[Dict[str, Any]]:
+    """Load the stock list snapshot, downloading it from FMP if missing or refresh is set."""
+    if os.path.exists(path) and not refresh:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    response = fmp_get(f"{BASE_URL}/stock/list?apikey={API_KEY}")
+    response.raise_for_status()
+    stock_list = response.json()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(stock_list, f)
+    return stock_list
+
+def read_review_decisions(path: str = SYMBOL_REVIEW_FILE) -> Dict[tuple, str]:
+    """accept value per (company, symbol) from the review file, if there is one."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return {(row['company_name'], row['symbol']): (row.get('accept') or '').strip().lower()
+                for row in csv.DictReader(f)}
+
+def write_review_file(review: Dict[str, List[Dict[str, Any]]], decisions: Dict[tuple, str],
+                      path: str = SYMBOL_REVIEW_FILE):
+    """Write the candidates still awaiting a decision, keeping earlier accept values."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REVIEW_COLUMNS)
+        writer.writeheader()
+        for company, candidates in review.items():
+            for entry in candidates:
+                writer.writerow({
+                    'company_name': company,
+                    'matched_name': entry['name'],
+                    'symbol': entry['symbol'],
+                    'exchange': entry.get('exchangeShortName'),
+                    'match_score': entry.get('match_score'),
+                    'accept': decisions.get((company, entry['symbol']), '')
+                })
+
+def apply_review_decisions(matches: Dict[str, Optional[Dict[str, Any]]], review: Dict[str, List[Dict[str, Any]]],
+                           decisions: Dict[tuple, str]):
+    """Use the candidates accepted in the review file as matches; the rest stay on the review list."""
+    for company, candidates in list(review.items()):
+        accepted = [entry for entry in candidates if decisions.get((company, entry['symbol'])) in ('y', 'yes')]
+        if accepted:
+            matches[company] = accepted[0]
+            del review[company]
+
 def get_financial_data(symbol: str) -> List[Dict[str, Any]]:
-    """Fetch financial data for a company from 2021 onwards."""
-    endpoints = [
-        f"{BASE_URL}/income-statement/{symbol}?apikey={API_KEY}",
-        f"{BASE_URL}/balance-sheet-statement/{symbol}?apikey={API_KEY}",
-        f"{BASE_URL}/cash-flow-statement/{symbol}?apikey={API_KEY}"
-    ]
-    financial_data = []
-    for endpoint in endpoints:
-        response = requests.get(endpoint)
+    """Fetch financial statements from START_YEAR onwards, one wide row per (date, period)."""
+    # Ask the API for only the periods we keep instead of the full history
+    limit = datetime.now().year - START_YEAR + 1
+    rows = {}
+    for statement in STATEMENTS:
+        endpoint = f"{BASE_URL}/{statement}/{symbol}?period={PERIOD}&limit={limit}&apikey={API_KEY}"
+        response = fmp_get(endpoint)
         if response.status_code == 200:
-            data = response.json()
-            # Filter data from 2021 onwards
-            filtered_data = [item for item in data if datetime.strptime(item['date'], '%Y-%m-%d').year >= 2021]
-            financial_data.extend(filtered_data)
+            for item in response.json():
+                # ISO dates compare correctly as strings
+                if item['date'][:4] < str(START_YEAR):
+                    continue
+                row = rows.setdefault((item['date'], item.get('period')), {})
+                for key, value in item.items():
+                    row.setdefault(key, value)
         else:
-            print(f"Error fetching data for {symbol} from {endpoint}: Status code {response.status_code}")
-    return financial_data
+            print(f"Error fetching {statement} for {symbol}: Status code {response.status_code}")
+    return [rows[key] for key in sorted(rows)]
 
 def find_best_match(search_results: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Find the best matching company from search results based on preferred exchanges."""
@@ -62,10 +201,14 @@ def find_best_match(search_results: List[Dict[str, Any]]) -> Dict[str, Any]:
     # If no preferred exchange is found, return the first result
     return search_results[0]
 
-def process_company(company: str) -> List[Dict[str, Any]]:
-    """Process a single company and return its financial data."""
-    search_results = search_company(company)
-    best_match = find_best_match(search_results)
+def process_company(company: str, best_match: Optional[Dict[str, Any]] = None,
+                    remote_search: bool = False) -> List[Dict[str, Any]]:
+    """Process a single company and return its financial data.
+
+    best_match comes from the local symbol index; remote_search uses the FMP search endpoint instead.
+    """
+    if remote_search:
+        best_match = find_best_match(search_company(company))
     
     if best_match:
         symbol = best_match['symbol']
@@ -77,7 +220,7 @@ def process_company(company: str) -> List[Dict[str, Any]]:
                     'matched_name': best_match['name'],
                     'symbol': symbol,
                     'exchange': best_match['exchangeShortName'],
-                    'currency': best_match['currency']
+                    'currency': best_match.get('currency')
                 })
             return financial_data
         else:
@@ -86,7 +229,7 @@ def process_company(company: str) -> List[Dict[str, Any]]:
                 'matched_name': best_match['name'],
                 'symbol': symbol,
                 'exchange': best_match['exchangeShortName'],
-                'currency': best_match['currency'],
+                'currency': best_match.get('currency'),
                 'error': 'No financial data'
             }]
     else:
@@ -95,39 +238,109 @@ def process_company(company: str) -> List[Dict[str, Any]]:
             'error': 'No match found'
         }]
 
-def main(file_path: str, output_dir: str):
+class StatementWriter:
+    """Writes rows to CSV or Parquet as they arrive, using the fixed OUTPUT_COLUMNS schema."""
+
+    def __init__(self, path: str, output_format: str = "csv"):
+        self.path = path
+        self.output_format = output_format
+        self.rows_written = 0
+        if output_format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            self._pa = pa
+            self._schema = pa.schema([(column, pa.string()) for column in ID_COLUMNS] +
+                                     [(column, pa.float64()) for column in STATEMENT_COLUMNS])
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            self._file = open(path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=OUTPUT_COLUMNS, extrasaction='ignore')
+            self._writer.writeheader()
+
+    def write(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        if self.output_format == "parquet":
+            columns = {column: [_as_text(row.get(column)) for row in rows] for column in ID_COLUMNS}
+            columns.update({column: [_as_number(row.get(column)) for row in rows] for column in STATEMENT_COLUMNS})
+            self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+        else:
+            self._writer.writerows(rows)
+            self._file.flush()
+        self.rows_written += len(rows)
+
+    def close(self):
+        if self.output_format == "parquet":
+            self._writer.close()
+        else:
+            self._file.close()
+
+def _as_text(value):
+    return None if value is None else str(value)
+
+def _as_number(value):
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+def main(file_path: str, output_dir: str, output_format: str = "csv", remote_search: bool = False):
     companies = read_excel_file(file_path)
     os.makedirs(output_dir, exist_ok=True)
-    output_file = os.path.join(output_dir, "consolidated_financial_data.csv")
+
+    # Resolve every company to a symbol locally in one pass, instead of one search call each
+    matches = {}
+    if not remote_search:
+        symbol_index = build_symbol_index(load_stock_list())
+        matches, review = match_companies(companies, symbol_index, PREFERRED_EXCHANGES)
+        decisions = read_review_decisions()
+        apply_review_decisions(matches, review, decisions)
+        write_review_file(review, decisions)
+        print(f"Matched {sum(match is not None for match in matches.values())} of {len(companies)} companies locally")
+        if review:
+            print(f"{len(review)} companies have ambiguous matches; accept the right ones in {SYMBOL_REVIEW_FILE}")
+    output_file = os.path.join(output_dir, f"consolidated_financial_data.{output_format}")
     
-    all_data = []
+    # Rows are streamed to disk as each company completes, so memory stays flat
+    writer = StatementWriter(output_file, output_format)
+    pending = companies
     
-    with ThreadPoolExecutor(max_workers=30) as executor:
-        future_to_company = {executor.submit(process_company, company): company for company in companies}
-        
-        for future in as_completed(future_to_company):
-            company = future_to_company[future]
-            try:
-                result = future.result()
-                all_data.extend(result)
-                print(f"Processed {company}")
-            except Exception as exc:
-                print(f'{company} generated an exception: {exc}')
-
-    # Write all data to a single CSV file
-    if all_data:
-        keys = set().union(*(d.keys() for d in all_data))
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=sorted(keys))
-            writer.writeheader()
-            for row in all_data:
-                writer.writerow(row)
+    for retry_round in range(MAX_RETRY_ROUNDS + 1):
+        retry_queue = []
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            future_to_company = {executor.submit(process_company, company, matches.get(company), remote_search): company for company in pending}
+            
+            for future in as_completed(future_to_company):
+                company = future_to_company[future]
+                try:
+                    writer.write(future.result())
+                    print(f"Processed {company}")
+                except RetryableError as exc:
+                    retry_queue.append(company)
+                    print(f'{company} will be retried: {exc}')
+                except Exception as exc:
+                    print(f'{company} generated an exception: {exc}')
         
-        print(f"All financial data saved to {output_file}")
+        if not retry_queue:
+            break
+        pending = retry_queue
+        if retry_round < MAX_RETRY_ROUNDS:
+            delay = RETRY_DELAY * 2 ** retry_round
+            print(f"Retrying {len(pending)} companies in {delay}s (concurrency limit {concurrency.limit:.1f})")
+            time.sleep(delay)
     else:
-        print("No data to write.")
+        print(f"Gave up on {len(pending)} companies after {MAX_RETRY_ROUNDS} retries: {', '.join(pending)}")
+
+    writer.close()
+    print(f"{writer.rows_written} rows of financial data saved to {output_file}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch financial statements from Financial Modeling Prep.")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--remote-search', action='store_true',
+                        help="Match companies with the FMP search endpoint instead of the local stock list")
+    args = parser.parse_args()
+
     excel_file_path = "cleaned_state_data.xlsx"
     output_directory = "financial_data_output"
-    main(excel_file_path, output_directory)
\ No newline at end of file
+    main(excel_file_path, output_directory, args.format, args.remote_search)
\ No newline at end of file
@@ -0,0 +1,101 @@
+import os
+import glob
+import difflib
+import pandas as pd
+from typing import Dict, List, Optional
+
+# Local city tables (city, lat, lng, country, iso2, admin_name, population, ...)
+MAP_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'map')
+
+# Trailing words that do not change which place is meant ("Brisbane City", "Darwin CBD")
+CITY_SUFFIX_PATTERN = r'\s+(city|cbd|central|municipality|shire|council)$'
+
+# Minimum similarity (0-1) for a fuzzy match to be accepted
+FUZZY_CUTOFF = 0.85
+
+
+def normalize_city_names(names: pd.Series) -> pd.Series:
+    """Normalize city names for matching: accents, case, punctuation and suffixes."""
+    return (names.fillna('').astype(str)
+                 .str.normalize('NFKD')
+                 .str.encode('ascii', errors='ignore')
+                 .str.decode('ascii')
+                 .str.lower()
+                 .str.replace(r'[^\w\s]', ' ', regex=True)
+                 .str.replace(r'\s+', ' ', regex=True)
+                 .str.strip()
+                 .str.replace(CITY_SUFFIX_PATTERN, '', regex=True))
+
+
+def load_gazetteer(paths: Optional[List[str]] = None) -> pd.DataFrame:
+    """Build the gazetteer from every local city table, one row per (name, country)."""
+    if paths is None:
+        paths = sorted(glob.glob(os.path.join(MAP_DATA_DIR, '*.csv')))
+
+    tables = []
+    for path in paths:
+        table = pd.read_csv(path)
+        if not {'city', 'lat', 'lng', 'iso2'}.issubset(table.columns):
+            continue
+        if 'population' not in table.columns:
+            table['population'] = 0
+        if 'admin_name' not in table.columns:
+            table['admin_name'] = None
+        tables.append(table[['city', 'lat', 'lng', 'iso2', 'admin_name', 'population']])
+
+    gazetteer = pd.concat(tables, ignore_index=True)
+    gazetteer['key'] = normalize_city_names(gazetteer['city'])
+
+    # Keep the most populous place when a name repeats within a country
+    gazetteer = (gazetteer.sort_values('population', ascending=False)
+                          .drop_duplicates(['key', 'iso2'])
+                          .reset_index(drop=True))
+    return gazetteer
+
+
+def _fuzzy_keys(unmatched: pd.DataFrame, gazetteer: pd.DataFrame) -> Dict[tuple, str]:
+    """Map each unmatched (key, iso2) pair to the closest gazetteer key in that country."""
+    candidates = gazetteer.groupby('iso2')['key'].apply(list).to_dict()
+    matches = {}
+    for key, iso2 in unmatched.itertuples(index=False):
+        if not key:
+            continue
+        close = difflib.get_close_matches(key, candidates.get(iso2, []), n=1, cutoff=FUZZY_CUTOFF)
+        if close:
+            matches[(key, iso2)] = close[0]
+    return matches
+
+
+def resolve_cities(frame: pd.DataFrame, city_col: str = 'City', country_col: str = 'Country',
+                   gazetteer: Optional[pd.DataFrame] = None, fuzzy: bool = True) -> pd.DataFrame:
+    """Attach lat, lng, admin_name and match type ('exact', 'fuzzy' or NaN) to every row.
+
+    Exact matches are a single hash join on the normalized name and country code.
+    Only the distinct names left over are compared fuzzily, once each.
+    """
+    if gazetteer is None:
+        gazetteer = load_gazetteer()
+
+    lookup = gazetteer[['key', 'iso2', 'lat', 'lng', 'admin_name']]
+    keys = pd.DataFrame({
+        'key': normalize_city_names(frame[city_col]).to_numpy(),
+        'iso2': frame[country_col].to_numpy()
+    })
+    resolved = keys.merge(lookup, on=['key', 'iso2'], how='left')
+    resolved['match'] = resolved['lat'].notna().map({True: 'exact', False: None})
+
+    if fuzzy:
+        unmatched = resolved.loc[resolved['lat'].isna(), ['key', 'iso2']].drop_duplicates()
+        fuzzy_keys = _fuzzy_keys(unmatched, gazetteer)
+        if fuzzy_keys:
+            missing = resolved['lat'].isna()
+            replacement = pd.Series(list(zip(resolved['key'], resolved['iso2'])))[missing].map(fuzzy_keys)
+            retry = pd.DataFrame({'key': replacement, 'iso2': resolved.loc[missing, 'iso2']})
+            retry = retry.dropna().reset_index().merge(lookup, on=['key', 'iso2'], how='inner').set_index('index')
+            resolved.loc[retry.index, ['lat', 'lng', 'admin_name']] = retry[['lat', 'lng', 'admin_name']]
+            resolved.loc[retry.index, 'match'] = 'fuzzy'
+
+    result = frame.copy()
+    for column in ['lat', 'lng', 'admin_name', 'match']:
+        result[column] = resolved[column].to_numpy()
+    return result
@@ -0,0 +1,300 @@
+"""On-disk HTTP cache shared by the data-collection scripts.
+
+Responses are keyed by (method, URL, query parameters) with credentials and
+signing parameters removed, stored gzip-compressed under CACHE_DIR, expire per
+endpoint and are evicted least-recently-used once the cache grows past
+MAX_CACHE_BYTES. HTTP_CACHE_MODE selects the behaviour:
+
+    use      serve fresh cache entries, fetch and store everything else (default)
+    offline  serve from the cache only; a miss raises CacheMiss
+    refresh  always fetch, then store the new response
+    off      bypass the cache entirely
+
+Run `python http_cache.py serve` to replay the cache as a local stub server.
+"""
+import os
+import sys
+import json
+import gzip
+import time
+import hashlib
+import argparse
+import threading
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from requests.structures import CaseInsensitiveDict
+
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), '.http_cache'))
+CACHE_MODE = os.getenv("HTTP_CACHE_MODE", "use")
+MAX_CACHE_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", 500 * 1024 * 1024))
+
+# Query parameters that carry credentials, never part of the key or the stored URL
+SECRET_PARAMS = {'apikey', 'api_key', 'key', 'token'}
+# Per-request signing parameters (e.g. pre-signed S3 image URLs) that do not change the content
+VOLATILE_PARAM_PREFIXES = ('x-amz-',)
+
+# Time to live per URL prefix in seconds; the longest matching prefix wins
+DEFAULT_TTL = 24 * 3600
+ENDPOINT_TTLS = {
+    "https://nubela.co/proxycurl/api/linkedin/company/resolve": 90 * 24 * 3600,
+    "https://nubela.co/proxycurl/api/linkedin/company/profile-picture": 3600,
+    "https://nubela.co/proxycurl/api/linkedin/company": 30 * 24 * 3600,
+    "https://financialmodelingprep.com/api/v3/search": 30 * 24 * 3600,
+    "https://financialmodelingprep.com/api/v3": 7 * 24 * 3600,
+    "https://maps.googleapis.com/maps/api/geocode": 365 * 24 * 3600,
+    "https://maps.googleapis.com/maps/api/place": 90 * 24 * 3600,
+}
+
+
+def _json_body(response: requests.Response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def _google_ok(response: requests.Response) -> bool:
+    # Quota, key and request errors also come back as HTTP 200
+    body = _json_body(response)
+    return isinstance(body, dict) and body.get('status') in ('OK', 'ZERO_RESULTS')
+
+
+def _fmp_ok(response: requests.Response) -> bool:
+    # Rate-limit and invalid-key responses are HTTP 200 with an "Error Message" object
+    body = _json_body(response)
+    return body is not None and not (isinstance(body, dict) and 'Error Message' in body)
+
+
+# Which HTTP 200 responses may be cached, per URL prefix; the longest matching prefix wins
+# and URLs without a validator cache every 200
+ENDPOINT_VALIDATORS = {
+    "https://financialmodelingprep.com/api": _fmp_ok,
+    "https://maps.googleapis.com/maps/api/geocode": _google_ok,
+    "https://maps.googleapis.com/maps/api/place": _google_ok,
+}
+
+# Eviction scans the cache directory, so only do it every few writes
+EVICT_EVERY_WRITES = 50
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a request is not in the cache."""
+
+
+def _keep_param(name: str) -> bool:
+    lowered = name.lower()
+    return lowered not in SECRET_PARAMS and not lowered.startswith(VOLATILE_PARAM_PREFIXES)
+
+
+def normalize_request(method: str, url: str, params: Optional[Dict] = None) -> str:
+    """Canonical request string: upper-case method, URL without query, sorted safe params."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query.extend((str(k), str(v)) for k, v in params.items() if v is not None)
+    query = sorted((k, v) for k, v in query if _keep_param(k))
+    base = f"{parts.scheme}://{parts.netloc}{parts.path}"
+    return f"{method.upper()} {base}?{urlencode(query)}" if query else f"{method.upper()} {base}"
+
+
+def cache_key(method: str, url: str, params: Optional[Dict] = None) -> str:
+    return hashlib.sha256(normalize_request(method, url, params).encode('utf-8')).hexdigest()
+
+
+def entry_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, key[:2], f"{key}.gz")
+
+
+def ttl_for(url: str, ttls: Dict[str, int] = ENDPOINT_TTLS) -> int:
+    matches = [prefix for prefix in ttls if url.startswith(prefix)]
+    return ttls[max(matches, key=len)] if matches else DEFAULT_TTL
+
+
+def cacheable(response: requests.Response, url: str,
+              validators: Dict[str, Callable[[requests.Response], bool]] = ENDPOINT_VALIDATORS) -> bool:
+    if response.status_code != 200:
+        return False
+    matches = [prefix for prefix in validators if url.startswith(prefix)]
+    return validators[max(matches, key=len)](response) if matches else True
+
+
+class CachedSession:
+    """Drop-in for the parts of requests.Session the collectors use (get/request).
+
+    throttle, if given, is called before every request that actually goes to the
+    network, so cache hits do not consume API rate-limit budget.
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, cache_dir: str = CACHE_DIR,
+                 mode: str = CACHE_MODE, max_bytes: int = MAX_CACHE_BYTES,
+                 throttle: Optional[Callable[[], None]] = None):
+        self.session = session or requests.Session()
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.throttle = throttle
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, url, params=None, **kwargs) -> requests.Response:
+        return self.request('GET', url, params=params, **kwargs)
+
+    def request(self, method, url, params=None, **kwargs) -> requests.Response:
+        if self.mode == 'off' or method.upper() != 'GET':
+            return self._fetch(method, url, params, **kwargs)
+
+        key = cache_key(method, url, params)
+        if self.mode != 'refresh':
+            cached = load_entry(entry_path(self.cache_dir, key), max_age=None if self.mode == 'offline' else ttl_for(url))
+            if cached is not None:
+                with self._lock:
+                    self.hits += 1
+                return cached
+        if self.mode == 'offline':
+            raise CacheMiss(normalize_request(method, url, params))
+
+        with self._lock:
+            self.misses += 1
+        response = self._fetch(method, url, params, **kwargs)
+        if cacheable(response, url):
+            self._store(key, method, url, params, response)
+        return response
+
+    def _fetch(self, method, url, params, **kwargs):
+        if self.throttle is not None:
+            self.throttle()
+        return self.session.request(method, url, params=params, **kwargs)
+
+    def _store(self, key, method, url, params, response):
+        meta = {
+            'request': normalize_request(method, url, params),
+            'status': response.status_code,
+            'headers': {k: v for k, v in response.headers.items()
+                        if k.lower() in ('content-type', 'etag', 'last-modified')},
+            'encoding': response.encoding,
+            'stored_at': time.time()
+        }
+        path = entry_path(self.cache_dir, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wb') as f:
+            f.write(json.dumps(meta).encode('utf-8') + b'\n' + response.content)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % EVICT_EVERY_WRITES == 0
+        if evict:
+            evict_lru(self.cache_dir, self.max_bytes)
+
+
+def load_entry(path: str, max_age: Optional[float] = None) -> Optional[requests.Response]:
+    """Rebuild a Response from a cache file, or None if missing or older than max_age."""
+    try:
+        with gzip.open(path, 'rb') as f:
+            meta_line, _, body = f.read().partition(b'\n')
+    except (FileNotFoundError, OSError, EOFError):
+        return None
+    meta = json.loads(meta_line)
+    if max_age is not None and time.time() - meta['stored_at'] > max_age:
+        return None
+
+    # Touch the file so eviction treats it as recently used; a concurrent
+    # eviction may already have removed it, but the body has been read
+    try:
+        os.utime(path, None)
+    except FileNotFoundError:
+        pass
+
+    response = requests.Response()
+    response.status_code = meta['status']
+    response.headers = CaseInsensitiveDict(meta['headers'])
+    response.encoding = meta['encoding']
+    response.url = meta['request'].split(' ', 1)[1]
+    response._content = body
+    response.from_cache = True
+    return response
+
+
+def _entries(cache_dir: str):
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if name.endswith('.gz'):
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                yield stat.st_mtime, stat.st_size, path
+
+
+def evict_lru(cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES) -> int:
+    """Delete least recently used entries until the cache fits in max_bytes."""
+    entries = sorted(_entries(cache_dir))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def serve(cache_dir: str = CACHE_DIR, host: str = '127.0.0.1', port: int = 8765):
+    """Replay cached responses over HTTP, ignoring TTLs.
+
+    Request http://host:port/<scheme>/<host>/<path>?<query> to get the cached
+    response for <scheme>://<host>/<path>?<query>; anything not cached is a 404.
+    """
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            scheme, _, rest = parts.path.lstrip('/').partition('/')
+            url = f"{scheme}://{rest}" + (f"?{parts.query}" if parts.query else '')
+            cached = load_entry(entry_path(cache_dir, cache_key('GET', url)))
+            if cached is None:
+                body = json.dumps({'error': 'not in cache', 'request': normalize_request('GET', url)}).encode('utf-8')
+                self.send_response(404)
+                self.send_header('Content-Type', 'application/json')
+            else:
+                body = cached.content
+                self.send_response(cached.status_code)
+                for name, value in cached.headers.items():
+                    self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    print(f"Serving {cache_dir} on http://{host}:{port}/<scheme>/<host>/<path>")
+    server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect, trim or serve the HTTP cache.")
+    parser.add_argument('command', choices=['stats', 'evict', 'clear', 'serve'])
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--max-bytes', type=int, default=MAX_CACHE_BYTES)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    if args.command == 'stats':
+        entries = list(_entries(args.cache_dir))
+        print(f"{len(entries)} entries, {sum(size for _, size, _ in entries) / 1024 / 1024:.1f} MB in {args.cache_dir}")
+    elif args.command == 'evict':
+        print(f"Removed {evict_lru(args.cache_dir, args.max_bytes)} entries")
+    elif args.command == 'clear':
+        print(f"Removed {evict_lru(args.cache_dir, 0)} entries")
+    else:
+        serve(args.cache_dir, port=args.port)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
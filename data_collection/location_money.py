@@ -1,9 +1,12 @@
 import os
 import time
+import argparse
 import pandas as pd
-import requests
 from typing import List, Dict
 from dotenv import load_dotenv
+from gazetteer import load_gazetteer, resolve_cities
+from http_cache import CachedSession
+from poi_index import PoiIndex, load_pois
 
 # Load environment variables
 load_dotenv()
@@ -11,6 +14,23 @@ load_dotenv()
 # Get Google API key from environment variable
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
+# Geocode and Places responses are answered from the on-disk HTTP cache on re-runs
+session = CachedSession()
+
+# Company cities written by /api/create_csv_files, used for offline geocoding
+CITY_LOCATIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'processed_data', 'city_locations.csv')
+# Cleaned company sheet, mapping input "Company Name" to the LinkedIn name city_locations.csv uses
+COMPANY_SHEET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'processed_data', 'cleaned_state_data.xlsx')
+
+# Place type -> (count column, names column) in the output
+PLACE_TYPES = {
+    "shopping_mall": ("Nearby Malls", "Mall Names"),
+    "restaurant": ("Nearby Restaurants", "Restaurant Names"),
+    "bus_station": ("Nearby Bus Stations", "Bus Station Names"),
+    "train_station": ("Nearby Train Stations", "Train Station Names")
+}
+SEARCH_RADIUS = 1000  # metres
+
 def geocode_company(company_name: str) -> Dict:
     """Geocode a company name using Google Geocoding API."""
     url = "https://maps.googleapis.com/maps/api/geocode/json"
@@ -18,7 +38,7 @@ def geocode_company(company_name: str) -> Dict:
         "address": f"{company_name}, Australia",
         "key": GOOGLE_API_KEY
     }
-    response = requests.get(url, params=params)
+    response = session.get(url, params=params)
     data = response.json()
     
     if data['status'] == 'OK':
@@ -26,55 +46,109 @@ def geocode_company(company_name: str) -> Dict:
         return {"latitude": location['lat'], "longitude": location['lng']}
     return None
 
-def get_nearby_places(lat: float, lon: float, place_type: str) -> List[Dict]:
+def linkedin_names(companies: List[str]) -> Dict[str, str]:
+    """LinkedIn name per input company name; names not in the company sheet are kept as given."""
+    sheet = pd.read_excel(COMPANY_SHEET_FILE, usecols=['Company Name', 'name']).dropna()
+    mapping = sheet.drop_duplicates('Company Name').set_index('Company Name')['name']
+    return {company: mapping.get(company, company) for company in companies}
+
+def geocode_companies_offline(companies: List[str]) -> Dict[str, Dict]:
+    """Geocode companies (input names) from their Australian cities using the local gazetteer."""
+    names = linkedin_names(companies)
+    locations = pd.read_csv(CITY_LOCATIONS_FILE)
+    locations = locations[locations['Company'].isin(set(names.values())) & (locations['Country'] == 'AU')]
+
+    resolved = resolve_cities(locations, gazetteer=load_gazetteer()).dropna(subset=['lat', 'lng'])
+    # A company with several Australian offices is placed at its first listed one
+    resolved = resolved.drop_duplicates('Company').set_index('Company')
+
+    result = {}
+    for company, name in names.items():
+        if name in resolved.index:
+            result[company] = {"latitude": resolved.at[name, 'lat'], "longitude": resolved.at[name, 'lng']}
+        else:
+            print(f"No Australian city with coordinates for {company} (LinkedIn name {name!r}) in {CITY_LOCATIONS_FILE}")
+    return result
+
+def get_nearby_places(lat: float, lon: float, place_type: str, radius: float = SEARCH_RADIUS) -> List[Dict]:
     """Get nearby places using Google Places API."""
     url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
     params = {
         "location": f"{lat},{lon}",
-        "radius": 1000,
+        "radius": radius,
         "type": place_type,
         "key": GOOGLE_API_KEY
     }
-    response = requests.get(url, params=params)
+    response = session.get(url, params=params)
     data = response.json()
     
     return [{'name': place['name'], 'type': place_type} for place in data.get('results', [])]
 
-def main(companies: List[str]):
+def nearby_places_from_index(locations: Dict[str, Dict], index: PoiIndex,
+                              radius: float = SEARCH_RADIUS) -> List[Dict]:
+    """Amenity counts and names for every located company in one pass over a local POI index."""
+    names = list(locations)
+    lats = [locations[name]['latitude'] for name in names]
+    lons = [locations[name]['longitude'] for name in names]
+
+    counts = index.count_within(lats, lons, radius, categories=list(PLACE_TYPES))
+    nearby = index.nearby(lats, lons, radius)
+    place_names = nearby.groupby(['query', 'category'])['name'].agg(', '.join).to_dict()
+
     results = []
+    for position, company in enumerate(names):
+        row = {"Company": company, "Latitude": lats[position], "Longitude": lons[position]}
+        for place_type, (count_column, _) in PLACE_TYPES.items():
+            row[count_column] = int(counts.at[position, place_type])
+        for place_type, (_, names_column) in PLACE_TYPES.items():
+            row[names_column] = place_names.get((position, place_type), "")
+        results.append(row)
+    return results
+
+def nearby_places_from_api(locations: Dict[str, Dict], radius: float = SEARCH_RADIUS) -> List[Dict]:
+    """Amenity counts and names from one Google Places search per company and place type."""
+    results = []
+    for company, location in locations.items():
+        lat, lon = location['latitude'], location['longitude']
+        places = {place_type: get_nearby_places(lat, lon, place_type, radius) for place_type in PLACE_TYPES}
+
+        row = {"Company": company, "Latitude": lat, "Longitude": lon}
+        for place_type, (count_column, _) in PLACE_TYPES.items():
+            row[count_column] = len(places[place_type])
+        for place_type, (_, names_column) in PLACE_TYPES.items():
+            row[names_column] = ", ".join(place['name'] for place in places[place_type])
+        results.append(row)
+
+        print(f"Added {company} with {len(places['shopping_mall'])} nearby malls, {len(places['restaurant'])} nearby restaurants, "
+              f"{len(places['bus_station'])} nearby bus stations, and {len(places['train_station'])} nearby train stations.")
+        time.sleep(0.5)  # To avoid hitting API rate limits
+    return results
+
+def main(companies: List[str], offline: bool = False, poi_file: str = None, radius: float = SEARCH_RADIUS):
+    # Offline mode resolves every company in one pass instead of one geocode call each
+    if offline:
+        locations = geocode_companies_offline(companies)
+    else:
+        locations = {}
+        for company in companies:
+            print(f"Processing {company}...")
+            location = geocode_company(company)
+            if location:
+                locations[company] = location
+            time.sleep(0.5)  # To avoid hitting API rate limits
 
     for company in companies:
-        print(f"Processing {company}...")
-        location = geocode_company(company)
-        
-        if location:
-            lat, lon = location['latitude'], location['longitude']
-            
-            malls = get_nearby_places(lat, lon, "shopping_mall")
-            restaurants = get_nearby_places(lat, lon, "restaurant")
-            bus_stations = get_nearby_places(lat, lon, "bus_station")
-            train_stations = get_nearby_places(lat, lon, "train_station")
-            
-            results.append({
-                "Company": company,
-                "Latitude": lat,
-                "Longitude": lon,
-                "Nearby Malls": len(malls),
-                "Nearby Restaurants": len(restaurants),
-                "Nearby Bus Stations": len(bus_stations),
-                "Nearby Train Stations": len(train_stations),
-                "Mall Names": ", ".join([mall['name'] for mall in malls]),
-                "Restaurant Names": ", ".join([restaurant['name'] for restaurant in restaurants]),
-                "Bus Station Names": ", ".join([station['name'] for station in bus_stations]),
-                "Train Station Names": ", ".join([station['name'] for station in train_stations])
-            })
-            
-            print(f"Added {company} with {len(malls)} nearby malls, {len(restaurants)} nearby restaurants, "
-                  f"{len(bus_stations)} nearby bus stations, and {len(train_stations)} nearby train stations.")
-        else:
+        if company not in locations:
             print(f"Couldn't find location for {company}")
-        
-        time.sleep(0.5)  # To avoid hitting API rate limits
+    # Keep the input order
+    locations = {company: locations[company] for company in companies if company in locations}
+
+    if poi_file:
+        # A local POI dump is indexed once; any radius or category is then a local query
+        index = PoiIndex(load_pois(poi_file))
+        results = nearby_places_from_index(locations, index, radius)
+    else:
+        results = nearby_places_from_api(locations, radius)
 
     # Save results to Excel file
     df = pd.DataFrame(results)
@@ -90,4 +164,13 @@ if __name__ == "__main__":
         # "Marriott International Australia", "DHL Supply Chain", "Specsavers", "Capgemini Australia", "Story House Early Learning"
     ]
     
-    main(australian_companies)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Count amenities around Australian company locations.")
+    parser.add_argument('--offline', action='store_true',
+                        help="Geocode from the local gazetteer instead of the Google Geocoding API")
+    parser.add_argument('--poi-file', metavar='PATH',
+                        help="Count amenities from a local POI dump (CSV/Parquet with name, category, lat, lng, "
+                             "or an Overpass JSON export) instead of Google Places")
+    parser.add_argument('--radius', type=float, default=SEARCH_RADIUS, help="Search radius in metres")
+    args = parser.parse_args()
+
+    main(australian_companies, offline=args.offline, poi_file=args.poi_file, radius=args.radius)
\ No newline at end of file
@@ -1,14 +1,21 @@
 import pandas as pd
 import requests
 import os
-import time
+import io
 import logging
 import json
+import hashlib
+import argparse
+import threading
 from urllib.parse import urlparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
+from PIL import Image
+from crawl_state import CrawlState
+from http_cache import CachedSession
+from rate_limit import TokenBucket
 
 # Load environment variables
 load_dotenv()
@@ -18,7 +25,9 @@ EXCEL_FILE = 'company_information_full.xlsx'
 API_ENDPOINT = 'https://nubela.co/proxycurl/api/linkedin/company/profile-picture'
 PROXYCURL_API = os.getenv("PROXYCURL_API")
 OUTPUT_FOLDER = 'company_images'
-MAX_WORKERS = 1
+THUMBNAIL_FOLDER = os.path.join(OUTPUT_FOLDER, 'thumbnails')
+MANIFEST_FILE = os.path.join(OUTPUT_FOLDER, 'manifest.json')
+MAX_WORKERS = 8
 RATE_LIMIT_PER_MINUTE = 5
 RETRY_STRATEGY = Retry(
     total=5,
@@ -27,102 +36,183 @@ RETRY_STRATEGY = Retry(
     backoff_factor=1
 )
 
+# Square thumbnail sizes (px) generated next to every original, stored as WebP
+THUMBNAIL_SIZES = [64, 128, 200]
+THUMBNAIL_QUALITY = 80
+
 # Set up logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(threadName)s - %(message)s')
 
-# Ensure the output folder exists
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+# Ensure the output folders exist
+os.makedirs(THUMBNAIL_FOLDER, exist_ok=True)
 
 def create_session():
     session = requests.Session()
-    adapter = HTTPAdapter(max_retries=RETRY_STRATEGY)
+    adapter = HTTPAdapter(max_retries=RETRY_STRATEGY, pool_maxsize=MAX_WORKERS)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     return session
 
-session = create_session()
+# Only the profile-picture API counts against the ProxyCurl quota; image downloads are not throttled.
+# Repeated runs are answered from the on-disk HTTP cache.
+rate_limiter = TokenBucket(RATE_LIMIT_PER_MINUTE)
+api_session = CachedSession(create_session(), throttle=rate_limiter.acquire)
+image_session = CachedSession(create_session())
+
+# Images are stored once per content hash, however many companies share them
+store_lock = threading.Lock()
+
+def store_image(content, file_extension='.jpg'):
+    """Save an image under its content hash with its thumbnails; returns the manifest entry."""
+    digest = hashlib.sha256(content).hexdigest()
+    name = digest[:16]
+    original_path = os.path.join(OUTPUT_FOLDER, f'{name}{file_extension}')
+    thumbnails = {str(size): os.path.join(THUMBNAIL_FOLDER, f'{name}_{size}.webp') for size in THUMBNAIL_SIZES}
+
+    with store_lock:
+        if not os.path.exists(original_path):
+            with open(original_path, 'wb') as f:
+                f.write(content)
+        missing = {size: path for size, path in thumbnails.items() if not os.path.exists(path)}
+
+    if missing:
+        image = Image.open(io.BytesIO(content)).convert('RGBA')
+        for size, path in missing.items():
+            write_thumbnail(image, int(size), path)
+
+    return {'hash': digest, 'original': original_path, 'thumbnails': thumbnails}
+
+def write_thumbnail(image, size, path):
+    """Fit the image into a size x size transparent square and save it as WebP."""
+    thumbnail = image.copy()
+    thumbnail.thumbnail((size, size), Image.LANCZOS)
+    canvas = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    canvas.paste(thumbnail, ((size - thumbnail.width) // 2, (size - thumbnail.height) // 2))
+    tmp_path = f'{path}.{threading.get_ident()}.tmp'
+    canvas.save(tmp_path, 'WEBP', quality=THUMBNAIL_QUALITY)
+    os.replace(tmp_path, path)
 
 def get_company_image(row):
     linkedin_url = row['LinkedIn URL']
     company_id = row.name  # Assuming the index is the company ID
-    
+
     logging.info(f"Processing company {company_id}: {linkedin_url}")
-    
+
     params = {'linkedin_company_profile_url': linkedin_url}
     headers = {'Authorization': f'Bearer {PROXYCURL_API}'}
-    
+
     try:
-        response = session.get(API_ENDPOINT, params=params, headers=headers)
+        response = api_session.get(API_ENDPOINT, params=params, headers=headers)
         response.raise_for_status()
-        
-        # Log the raw response content
-        logging.debug(f"Raw API Response for company {company_id}: {response.content}")
-        
-        # Attempt to parse JSON response
+
         try:
             response_json = response.json()
-            logging.debug(f"Parsed API Response for company {company_id}: {json.dumps(response_json, indent=2)}")
         except json.JSONDecodeError:
             logging.error(f"Failed to parse JSON response for company {company_id}")
             return company_id, None
-        
-        image_url = response_json.get('tmp_profile_pic_url')  # Changed from 'image' to 'tmp_profile_pic_url'
+
+        image_url = response_json.get('tmp_profile_pic_url')
         if image_url:
-            logging.info(f"Image URL found for company {company_id}: {image_url}")
             # Download the image
-            image_response = session.get(image_url)
+            image_response = image_session.get(image_url)
             image_response.raise_for_status()
-            
-            # Parse the filename from the URL
-            parsed_url = urlparse(image_url)
-            file_name = os.path.basename(parsed_url.path)
+
+            # Parse the extension from the URL
+            file_name = os.path.basename(urlparse(image_url).path)
             file_extension = os.path.splitext(file_name)[1] or '.jpg'
-            
-            # Save the image
-            image_path = os.path.join(OUTPUT_FOLDER, f'{company_id}{file_extension}')
-            with open(image_path, 'wb') as f:
-                f.write(image_response.content)
-            
-            logging.info(f"Image saved for company {company_id}: {image_path}")
-            return company_id, image_path
+
+            entry = store_image(image_response.content, file_extension)
+            logging.info(f"Image saved for company {company_id}: {entry['original']}")
+            return company_id, entry
         else:
             logging.warning(f"No image URL found in the response for company {company_id}")
             return company_id, None
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, OSError) as e:
         logging.error(f"Error processing company {company_id}: {str(e)}")
         return company_id, None
 
-def rate_limited_api_call(row):
-    time.sleep(60 / RATE_LIMIT_PER_MINUTE)  # Wait to respect rate limit
-    return get_company_image(row)
+def existing_image(row):
+    """Manifest entry built from an image a previous run already saved, without API calls."""
+    path = row['Image Path']
+    with open(path, 'rb') as f:
+        return row.name, store_image(f.read(), os.path.splitext(path)[1] or '.jpg')
+
+def load_manifest(path=MANIFEST_FILE):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
 
-def main():
+def write_manifest(manifest, path=MANIFEST_FILE):
+    # Write to a temporary file and rename, so readers never see a partial manifest
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def main(refresh_older_than_days=None, from_existing=False):
     logging.info(f"Starting process. Reading Excel file: {EXCEL_FILE}")
     # Read the Excel file
     df = pd.read_excel(EXCEL_FILE)
-    
-    logging.info(f"Total companies to process: {len(df)}")
-    
-    # Create a new column for image paths
-    df['Image Path'] = ''
-    
-    # Use ThreadPoolExecutor for concurrent API calls
+    manifest = load_manifest()
+
+    if from_existing:
+        # Re-index images saved by earlier runs: dedupe and thumbnails only, no API calls
+        rows = df[df['Image Path'].fillna('').astype(str).map(os.path.exists)]
+        task = existing_image
+        state = None
+    else:
+        # Only fetch logos that earlier runs did not already save (or that are too old)
+        state = CrawlState('logo')
+        max_age = refresh_older_than_days * 86400 if refresh_older_than_days is not None else None
+        todo = set(state.pending(df['Company Name'], max_age=max_age))
+        rows = df[df['Company Name'].isin(todo)]
+        task = get_company_image
+
+    logging.info(f"Companies to process: {len(rows)} of {len(df)}")
+
+    # Keep image paths from earlier runs for companies that are not re-processed
+    previous = df['Image Path'].fillna('').astype(str) if 'Image Path' in df else pd.Series('', index=df.index)
+    df['Image Path'] = [manifest.get(name, {}).get('original') or path
+                        for name, path in zip(df['Company Name'], previous)]
+
+    # Downloads run concurrently; the token bucket keeps API calls within the quota
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        future_to_company = {executor.submit(rate_limited_api_call, row): row for _, row in df.iterrows()}
-        
+        future_to_company = {executor.submit(task, row): row for _, row in rows.iterrows()}
+
         for future in as_completed(future_to_company):
-            company_id, image_path = future.result()
-            if image_path:
-                df.at[company_id, 'Image Path'] = image_path
-    
+            row = future_to_company[future]
+            company_id, entry = future.result()
+            if entry:
+                # Keyed by the input name like the crawl state; the API looks logos up by LinkedIn name
+                linkedin_name = row.get('name')
+                entry.update(company_id=int(company_id), linkedin_url=row['LinkedIn URL'],
+                             name=linkedin_name if pd.notna(linkedin_name) else None)
+                manifest[row['Company Name']] = entry
+                df.at[company_id, 'Image Path'] = entry['original']
+                if state:
+                    state.mark_done(row['Company Name'], row['LinkedIn URL'], entry['hash'], output=entry['original'])
+            elif state:
+                state.mark_failed(row['Company Name'], "No image saved", row['LinkedIn URL'])
+
+    write_manifest(manifest)
+
     # Save the updated DataFrame back to Excel
     df.to_excel(EXCEL_FILE, index=False)
     logging.info(f"Updated Excel file saved: {EXCEL_FILE}")
-    
+
     # Print summary
     total_companies = len(df)
-    companies_with_images = df['Image Path'].notna().sum()
-    logging.info(f"Process completed. Images found for {companies_with_images} out of {total_companies} companies.")
+    companies_with_images = (df['Image Path'] != '').sum()
+    unique_images = len({entry['hash'] for entry in manifest.values()})
+    logging.info(f"Process completed. Images found for {companies_with_images} out of {total_companies} companies "
+                 f"({unique_images} unique images).")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Download company logos from ProxyCurl.")
+    parser.add_argument('--refresh-older-than', type=float, metavar='DAYS',
+                        help="Also re-download logos older than DAYS")
+    parser.add_argument('--from-existing', action='store_true',
+                        help="Only dedupe and build thumbnails for images already on disk")
+    args = parser.parse_args()
+    main(refresh_older_than_days=args.refresh_older_than, from_existing=args.from_existing)
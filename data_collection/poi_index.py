@@ -0,0 +1,130 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from typing import List, Optional
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE_LAT = 111320.0
+
+# Grid cell size in degrees (~1.1 km north-south); any radius works, larger ones scan more cells
+CELL_DEGREES = 0.01
+
+# OpenStreetMap tags that mean the same thing as the Google Places types location_money.py counts
+OSM_CATEGORIES = {
+    ('shop', 'mall'): 'shopping_mall',
+    ('amenity', 'restaurant'): 'restaurant',
+    ('amenity', 'bus_station'): 'bus_station',
+    ('highway', 'bus_stop'): 'bus_station',
+    ('railway', 'station'): 'train_station',
+    ('public_transport', 'station'): 'train_station',
+}
+
+
+def load_pois(path: str) -> pd.DataFrame:
+    """Points of interest (name, category, lat, lng) from a local dump.
+
+    Accepts a CSV or Parquet table with those columns, or an Overpass API JSON
+    export whose OSM tags are mapped to categories with OSM_CATEGORIES.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        pois = pd.read_parquet(path)
+    elif extension == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            elements = json.load(f).get('elements', [])
+        rows = []
+        for element in elements:
+            tags = element.get('tags', {})
+            # Ways and relations carry a centre point when exported with "out center"
+            point = element if 'lat' in element else element.get('center', {})
+            if 'lat' not in point:
+                continue
+            for (key, value), category in OSM_CATEGORIES.items():
+                if tags.get(key) == value:
+                    rows.append({'name': tags.get('name', ''), 'category': category,
+                                 'lat': point['lat'], 'lng': point['lon']})
+                    break
+        pois = pd.DataFrame(rows, columns=['name', 'category', 'lat', 'lng'])
+    else:
+        pois = pd.read_csv(path)
+
+    pois = pois.dropna(subset=['lat', 'lng'])
+    pois['name'] = pois['name'].fillna('').astype(str)
+    return pois.reset_index(drop=True)
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """Great-circle distance in metres between points given in radians (numpy broadcasting)."""
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+class PoiIndex:
+    """Grid-bucketed points of interest for radius queries on haversine distance.
+
+    Points are sorted by (lat cell, lng cell), so each row of cells around a query
+    point is one contiguous slice found with searchsorted.
+    """
+
+    def __init__(self, pois: pd.DataFrame, cell_degrees: float = CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        lat_cells = np.floor(pois['lat'].to_numpy(dtype=np.float64) / cell_degrees).astype(np.int64)
+        lng_cells = np.floor(pois['lng'].to_numpy(dtype=np.float64) / cell_degrees).astype(np.int64)
+        self._lng_span = int(np.ceil(360 / cell_degrees)) + 1
+        keys = lat_cells * self._lng_span + lng_cells
+        order = np.argsort(keys, kind='stable')
+
+        self.keys = keys[order]
+        self.pois = pois.iloc[order].reset_index(drop=True)
+        self.lat = np.radians(self.pois['lat'].to_numpy(dtype=np.float64))
+        self.lng = np.radians(self.pois['lng'].to_numpy(dtype=np.float64))
+        self.categories, self.category_codes = np.unique(self.pois['category'].astype(str), return_inverse=True)
+
+    def candidates(self, lat: float, lng: float, radius_m: float) -> np.ndarray:
+        """Positions of points in the grid cells that can lie within radius_m of (lat, lng)."""
+        lat_reach = int(np.ceil(radius_m / METERS_PER_DEGREE_LAT / self.cell_degrees))
+        lng_scale = max(np.cos(np.radians(lat)), 1e-6)
+        lng_reach = int(np.ceil(radius_m / (METERS_PER_DEGREE_LAT * lng_scale) / self.cell_degrees))
+        lat_cell = int(np.floor(lat / self.cell_degrees))
+        lng_cell = int(np.floor(lng / self.cell_degrees))
+
+        rows = np.arange(lat_cell - lat_reach, lat_cell + lat_reach + 1) * self._lng_span
+        starts = np.searchsorted(self.keys, rows + lng_cell - lng_reach, side='left')
+        ends = np.searchsorted(self.keys, rows + lng_cell + lng_reach, side='right')
+        return np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+
+    def within(self, lats, lngs, radius_m: float):
+        """(query position, point position, distance) for every point closer than radius_m, all queries at once."""
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        candidate_lists = [self.candidates(lat, lng, radius_m) for lat, lng in zip(lats, lngs)]
+        queries = np.repeat(np.arange(len(lats)), [len(c) for c in candidate_lists])
+        points = np.concatenate(candidate_lists).astype(np.int64) if candidate_lists else np.array([], np.int64)
+
+        distances = haversine(np.radians(lats[queries]), np.radians(lngs[queries]), self.lat[points], self.lng[points])
+        close = distances <= radius_m
+        return queries[close], points[close], distances[close]
+
+    def nearby(self, lats, lngs, radius_m: float) -> pd.DataFrame:
+        """One row (query, category, name, distance_m) per point within radius_m of each query, nearest first."""
+        queries, points, distances = self.within(lats, lngs, radius_m)
+        pairs = pd.DataFrame({
+            'query': queries,
+            'category': self.categories[self.category_codes[points]],
+            'name': self.pois['name'].to_numpy()[points],
+            'distance_m': distances
+        })
+        return pairs.sort_values(['query', 'distance_m'], kind='stable').reset_index(drop=True)
+
+    def count_within(self, lats, lngs, radius_m: float,
+                     categories: Optional[List[str]] = None) -> pd.DataFrame:
+        """Per-query counts of points within radius_m, one column per category."""
+        queries, points, _ = self.within(lats, lngs, radius_m)
+        n_queries, n_categories = len(lats), len(self.categories)
+        counts = np.bincount(queries * n_categories + self.category_codes[points],
+                             minlength=n_queries * n_categories).reshape(n_queries, n_categories)
+        counts = pd.DataFrame(counts, columns=self.categories)
+        if categories is not None:
+            counts = counts.reindex(columns=categories, fill_value=0)
+        return counts
@@ -1,21 +1,95 @@
-import csv
+import os
+import numpy as np
 import pandas as pd
 
-def process_financial_data(input_file, output_file):
-    # Read the CSV file
-    df = pd.read_csv(input_file)
+# Columns that describe a statement rather than hold financial figures
+ID_COLUMNS = ['company_name', 'matched_name', 'symbol', 'exchange', 'currency', 'date', 'calendarYear', 'period',
+              'link', 'finalLink', 'error', 'reportedCurrency', 'cik', 'acceptedDate', 'fillingDate']
+
+# Derived per-company metrics: name -> (numerator, denominator). Ratios are currency-free,
+# so they can be compared across companies reporting in different currencies.
+RATIO_METRICS = {
+    'gross_margin': ('grossProfit', 'revenue'),
+    'operating_margin': ('operatingIncome', 'revenue'),
+    'net_margin': ('netIncome', 'revenue'),
+    'ebitda_margin': ('ebitda', 'revenue'),
+    'operating_cash_flow_margin': ('operatingCashFlow', 'revenue'),
+    'free_cash_flow_margin': ('freeCashFlow', 'revenue'),
+    'cash_conversion': ('operatingCashFlow', 'netIncome'),
+    'debt_to_equity': ('totalDebt', 'totalStockholdersEquity'),
+}
+GROWTH_METRICS = {
+    'revenue_growth': 'revenue',
+    'net_income_growth': 'netIncome',
+    'operating_cash_flow_growth': 'operatingCashFlow',
+}
+DERIVED_METRICS = list(RATIO_METRICS) + list(GROWTH_METRICS)
 
-    # Remove rows where all financial data is empty or zero
-    financial_columns = df.columns.drop(['company_name', 'matched_name', 'symbol', 'exchange', 'currency', 'date', 'calendarYear', 'period', 'link', 'finalLink', 'error'])
-    df['has_data'] = df[financial_columns].apply(lambda x: x.notna().any() and (x != 0).any(), axis=1)
-    df = df[df['has_data']].drop(columns=['has_data'])
 
-    # Sort the dataframe by company name and date
+def read_statements(input_file):
+    """Read the collector output once (CSV or Parquet) as one row per company and period.
+
+    Older collector runs wrote one row per statement (income, balance sheet, cash
+    flow) for the same date; those rows are merged, keeping the first value of each column.
+    """
+    if input_file.endswith('.parquet'):
+        df = pd.read_parquet(input_file)
+    else:
+        df = pd.read_csv(input_file, low_memory=False)
     df['date'] = pd.to_datetime(df['date'], errors='coerce')
-    df = df.sort_values(['company_name', 'date'])
+    merged = df.groupby(['company_name', 'date', 'period'], sort=False, dropna=False).first()
+    return merged.copy().reset_index()
+
+
+def financial_columns(df):
+    return [column for column in df.columns
+            if column not in ID_COLUMNS and pd.api.types.is_numeric_dtype(df[column])]
+
+
+def fiscal_years(df):
+    """Fiscal year per row: calendarYear where reported, otherwise the year of the statement date."""
+    years = pd.to_numeric(df['calendarYear'], errors='coerce')
+    return years.fillna(pd.to_datetime(df['date']).dt.year).astype('Int64')
+
+
+def derive_metrics(df):
+    """Add margins, cash-flow ratios and year-over-year growth, per company in date order.
+
+    Growth compares each fiscal year with the company's previous fiscal year, so it is
+    left empty after a missing year rather than spanning two.
+    """
+    df = df.sort_values(['company_name', 'date']).reset_index(drop=True)
+    derived = {}
+
+    for name, (numerator, denominator) in RATIO_METRICS.items():
+        derived[name] = df[numerator] / df[denominator].where(df[denominator] != 0)
 
-    # Write to CSV
-    df.to_csv(output_file, index=False)
+    # Each row's figures, moved forward one fiscal year to line up with the next year's row
+    growth_columns = list(GROWTH_METRICS.values())
+    keys = pd.DataFrame({'company_name': df['company_name'], 'year': fiscal_years(df)})
+    prior = df[growth_columns].assign(company_name=df['company_name'], year=keys['year'] + 1)
+    # With several statements in one fiscal year, the latest one is the year's figure
+    prior = prior.drop_duplicates(['company_name', 'year'], keep='last')
+    previous = keys.merge(prior, on=['company_name', 'year'], how='left')
+    for name, column in GROWTH_METRICS.items():
+        # Growth off a negative or zero base has no meaningful sign, so it is left empty
+        base = previous[column].where(previous[column] > 0)
+        derived[name] = df[column] / base - 1
+
+    derived = pd.DataFrame(derived).replace([np.inf, -np.inf], np.nan)
+    return pd.concat([df.drop(columns=DERIVED_METRICS, errors='ignore'), derived], axis=1)
+
+
+def process_financial_data(input_file, output_file):
+    df = read_statements(input_file)
+    all_companies = set(df['company_name'].dropna().unique())
+
+    # Remove rows where all financial data is empty or zero
+    values = df[financial_columns(df)]
+    df = df[(values.notna() & (values != 0)).any(axis=1)]
+
+    df = derive_metrics(df)
+    df.to_parquet(output_file, index=False)
 
     print(f"Processed data has been written to {output_file}")
 
@@ -26,13 +100,24 @@ def process_financial_data(input_file, output_file):
         print(company)
 
     # Print companies without data
-    all_companies = set(pd.read_csv(input_file)['company_name'].unique())
     companies_without_data = all_companies - set(companies_with_data)
     print("\nCompanies without financial data:")
-    for company in companies_without_data:
+    for company in sorted(companies_without_data):
         print(company)
 
-# Use the function
-input_file = 'financial_data_output/consolidated_financial_data.csv'
-output_file = 'processed_financial_data.csv'
-process_financial_data(input_file, output_file)
\ No newline at end of file
+    return df
+
+
+def load_financial_data(path):
+    """Processed financial data for the API: the Parquet output, or a CSV processed on the fly."""
+    if path.endswith('.parquet') and os.path.exists(path):
+        return pd.read_parquet(path)
+    csv_path = os.path.splitext(path)[0] + '.csv'
+    df = read_statements(csv_path)
+    return derive_metrics(df)
+
+
+if __name__ == "__main__":
+    input_file = 'financial_data_output/consolidated_financial_data.csv'
+    output_file = 'processed_financial_data.parquet'
+    process_financial_data(input_file, output_file)
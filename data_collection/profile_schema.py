@@ -0,0 +1,252 @@
+"""Schema-aware normalizer for ProxyCurl company profiles.
+
+Turns profile responses into one typed company table (one row per company_id)
+and child tables keyed by company_id for the list-valued fields, so downstream
+loads need no string coercion and no JSON parsing.
+"""
+import os
+import json
+import pandas as pd
+from typing import Any, Dict, Iterable, List, Optional
+
+# Company table columns and their pandas dtypes; nested objects are flattened with '_'
+COMPANY_COLUMNS = {
+    'company_id': 'Int64',
+    'company_name': 'string',
+    'linkedin_url': 'string',
+    'status': 'string',
+    'error': 'string',
+    'linkedin_internal_id': 'string',
+    'name': 'string',
+    'universal_name_id': 'string',
+    'description': 'string',
+    'tagline': 'string',
+    'website': 'string',
+    'industry': 'string',
+    'company_type': 'string',
+    'company_size_min': 'Int64',
+    'company_size_max': 'Int64',
+    'company_size_on_linkedin': 'Int64',
+    'founded_year': 'Int64',
+    'follower_count': 'Int64',
+    'hq_country': 'string',
+    'hq_state': 'string',
+    'hq_city': 'string',
+    'hq_postal_code': 'string',
+    'hq_line_1': 'string',
+    'hq_is_hq': 'boolean',
+    'profile_pic_url': 'string',
+    'background_cover_image_url': 'string',
+    'search_id': 'string',
+    'acquired_by_linkedin_profile_url': 'string',
+    'acquired_by_crunchbase_profile_url': 'string',
+    'acquired_by_announced_date': 'datetime',
+    'acquired_by_price': 'Float64',
+    'extra_crunchbase_profile_url': 'string',
+    'extra_crunchbase_rank': 'Int64',
+    'extra_ipo_status': 'string',
+    'extra_ipo_date': 'datetime',
+    'extra_stock_symbol': 'string',
+    'extra_founding_date': 'datetime',
+    'extra_operating_status': 'string',
+    'extra_company_type': 'string',
+    'extra_contact_email': 'string',
+    'extra_phone_number': 'string',
+    'extra_facebook_id': 'string',
+    'extra_twitter_id': 'string',
+    'extra_number_of_funding_rounds': 'Int64',
+    'extra_total_funding_amount': 'Float64',
+    'extra_number_of_lead_investors': 'Int64',
+    'extra_number_of_investors': 'Int64',
+    'extra_total_fund_raised': 'Float64',
+    'extra_number_of_investments': 'Int64',
+    'extra_number_of_lead_investments': 'Int64',
+    'extra_number_of_exits': 'Int64',
+    'extra_number_of_acquisitions': 'Int64',
+}
+
+# Child table -> (profile field, columns with dtypes). Every child row also carries company_id
+# and its position in the original list.
+CHILD_TABLES = {
+    'locations': ('locations', {
+        'country': 'string', 'state': 'string', 'city': 'string', 'postal_code': 'string',
+        'line_1': 'string', 'is_hq': 'boolean'
+    }),
+    'specialities': ('specialities', {'speciality': 'string'}),
+    'categories': ('categories', {'category': 'string'}),
+    'funding_rounds': ('funding_data', {
+        'funding_type': 'string', 'money_raised': 'Float64', 'announced_date': 'datetime',
+        'number_of_investor': 'Int64', 'investors': 'string'
+    }),
+    'similar_companies': ('similar_companies', {
+        'name': 'string', 'link': 'string', 'industry': 'string', 'location': 'string'
+    }),
+    'affiliated_companies': ('affiliated_companies', {
+        'name': 'string', 'link': 'string', 'industry': 'string', 'location': 'string'
+    }),
+    'updates': ('updates', {
+        'posted_on': 'datetime', 'text': 'string', 'article_link': 'string',
+        'image': 'string', 'total_likes': 'Int64'
+    }),
+    'acquisitions': ('acquisitions_acquired', {
+        'linkedin_profile_url': 'string', 'crunchbase_profile_url': 'string',
+        'announced_date': 'datetime', 'price': 'Float64'
+    }),
+    'exits': ('exit_data', {
+        'name': 'string', 'linkedin_profile_url': 'string', 'crunchbase_profile_url': 'string'
+    }),
+    'customers': ('customer_list', {'customer': 'string'}),
+}
+
+# Lists of plain strings become one named column
+STRING_LIST_COLUMNS = {'specialities': 'speciality', 'categories': 'category', 'customers': 'customer'}
+
+# List-valued profile fields the workbook keeps as JSON text, as the cleaning step and the
+# API read them (acquisitions_acquired is acquisitions.acquired, as in CHILD_TABLES)
+WORKBOOK_JSON_FIELDS = [
+    'company_size', 'specialities', 'locations', 'similar_companies', 'affiliated_companies', 'updates',
+    'acquisitions_acquired', 'exit_data', 'funding_data', 'categories', 'customer_list'
+]
+
+
+def parse_date(value: Any) -> Optional[pd.Timestamp]:
+    """ProxyCurl {day, month, year} objects (day/month may be missing) or date strings to a Timestamp."""
+    if isinstance(value, dict):
+        if not value.get('year'):
+            return None
+        return pd.Timestamp(year=int(value['year']), month=int(value.get('month') or 1), day=int(value.get('day') or 1))
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return pd.to_datetime(value, errors='coerce')
+
+
+def typed_frame(rows: List[Dict[str, Any]], columns: Dict[str, str]) -> pd.DataFrame:
+    """DataFrame with exactly the given columns, cast to their dtypes."""
+    frame = pd.DataFrame(rows, columns=list(columns))
+    for column, dtype in columns.items():
+        if dtype.startswith('datetime'):
+            frame[column] = pd.to_datetime(frame[column], errors='coerce')
+        elif dtype in ('Int64', 'Float64'):
+            frame[column] = pd.to_numeric(frame[column], errors='coerce').astype(dtype)
+        else:
+            frame[column] = frame[column].astype(dtype)
+    return frame
+
+
+def company_row(company_id: int, profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Scalar fields of one profile, named as in COMPANY_COLUMNS."""
+    row = {key: profile.get(key) for key in COMPANY_COLUMNS if key in profile and not isinstance(profile[key], (dict, list))}
+    row['company_id'] = company_id
+
+    size = profile.get('company_size') or [None, None]
+    row['company_size_min'], row['company_size_max'] = (list(size) + [None, None])[:2]
+
+    for key, value in (profile.get('hq') or {}).items():
+        row[f'hq_{key}'] = value
+
+    acquired_by = (profile.get('acquisitions') or {}).get('acquired_by') or {}
+    for key, value in acquired_by.items():
+        row[f'acquired_by_{key}'] = parse_date(value) if key == 'announced_date' else value
+
+    for key, value in (profile.get('extra') or {}).items():
+        row[f'extra_{key}'] = parse_date(value) if key.endswith('_date') else value
+    return row
+
+
+def child_rows(table: str, company_id: int, items: Iterable[Any]) -> List[Dict[str, Any]]:
+    _, columns = CHILD_TABLES[table]
+    rows = []
+    for position, item in enumerate(items or []):
+        if table in STRING_LIST_COLUMNS:
+            row = {STRING_LIST_COLUMNS[table]: item}
+        elif isinstance(item, dict):
+            row = {key: item.get(key) for key in columns}
+            for key, dtype in columns.items():
+                if dtype.startswith('datetime'):
+                    row[key] = parse_date(item.get(key))
+            if table == 'funding_rounds':
+                row['investors'] = ', '.join(investor.get('name') or '' for investor in item.get('investor_list') or [])
+        else:
+            continue
+        row.update(company_id=company_id, position=position)
+        rows.append(row)
+    return rows
+
+
+def _profile_field(profile: Dict[str, Any], field: str) -> Any:
+    if field == 'acquisitions_acquired':
+        return (profile.get('acquisitions') or {}).get('acquired')
+    return profile.get(field)
+
+
+def _child_frame(table: str, rows: List[Dict[str, Any]]) -> pd.DataFrame:
+    _, columns = CHILD_TABLES[table]
+    return typed_frame(rows, {'company_id': 'Int64', 'position': 'Int64', **columns})
+
+
+def normalize_profiles(records: Iterable[Dict[str, Any]]) -> Dict[str, pd.DataFrame]:
+    """Company table plus child tables from collector records.
+
+    Each record has company_id, company_name, linkedin_url, status, error and
+    profile (the ProxyCurl response, or None if the fetch failed).
+    """
+    companies, children = [], {table: [] for table in CHILD_TABLES}
+    for record in records:
+        profile = record.get('profile') or {}
+        row = company_row(record['company_id'], profile)
+        row.update({key: record.get(key) for key in ('company_name', 'linkedin_url', 'status', 'error')})
+        companies.append(row)
+        for table, (field, _) in CHILD_TABLES.items():
+            children[table].extend(child_rows(table, record['company_id'], _profile_field(profile, field)))
+
+    tables = {'companies': typed_frame(companies, COMPANY_COLUMNS)}
+    tables.update({table: _child_frame(table, rows) for table, rows in children.items()})
+    return tables
+
+
+def workbook_json_columns(records: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """WORKBOOK_JSON_FIELDS of each record's profile as JSON text (None where missing), in record order."""
+    rows = []
+    for record in records:
+        profile = record.get('profile') or {}
+        values = {field: _profile_field(profile, field) for field in WORKBOOK_JSON_FIELDS}
+        rows.append({field: None if value is None else json.dumps(value) for field, value in values.items()})
+    return pd.DataFrame(rows, columns=WORKBOOK_JSON_FIELDS, dtype='object')
+
+
+def _json_list(value: Any) -> List[Any]:
+    if isinstance(value, list):
+        return value
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return []
+    try:
+        parsed = json.loads(value)
+    except (TypeError, ValueError):
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+
+def child_tables_from_flat(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Child tables from an already-flattened table (e.g. cleaned_state_data.xlsx) whose list
+    columns hold JSON text; company_id is the row's index."""
+    tables = {}
+    for table, (field, _) in CHILD_TABLES.items():
+        if field not in df.columns:
+            continue
+        rows = []
+        for company_id, value in zip(df.index, df[field]):
+            rows.extend(child_rows(table, int(company_id), _json_list(value)))
+        tables[table] = _child_frame(table, rows)
+    return tables
+
+
+def write_tables(tables: Dict[str, pd.DataFrame], directory: str):
+    """One Parquet file per table, e.g. <directory>/locations.parquet."""
+    os.makedirs(directory, exist_ok=True)
+    for table, frame in tables.items():
+        frame.to_parquet(os.path.join(directory, f'{table}.parquet'), index=False)
+
+
+def read_tables(directory: str) -> Dict[str, pd.DataFrame]:
+    return {os.path.splitext(name)[0]: pd.read_parquet(os.path.join(directory, name))
+            for name in sorted(os.listdir(directory)) if name.endswith('.parquet')}
@@ -0,0 +1,66 @@
+import time
+import threading
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every worker that calls the same API.
+
+    Tokens refill continuously at `rate` per `period` seconds, up to `capacity`.
+    `acquire()` blocks until a token is available, so any number of threads can
+    share one quota without a global fixed spacing between calls.
+    """
+
+    def __init__(self, rate, period=60.0, capacity=None):
+        self.rate = float(rate)
+        self.period = float(period)
+        self.capacity = float(capacity if capacity is not None else max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate / self.period)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) * self.period / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """Caps the number of requests in flight and adjusts the cap from outcomes (AIMD).
+
+    Each success grows the cap by about one request per full window (additive
+    increase); a throttled or failed call halves it (multiplicative decrease), so
+    the fetchers settle just below what the API tolerates.
+    """
+
+    def __init__(self, initial=8, minimum=1, maximum=30, decrease_factor=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, success=True):
+        with self._condition:
+            self._in_flight -= 1
+            if success:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            else:
+                self.limit = max(self.minimum, self.limit * self.decrease_factor)
+            self._condition.notify_all()
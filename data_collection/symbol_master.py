@@ -0,0 +1,119 @@
+import re
+import difflib
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Words that say what kind of entity a company is, not which company it is
+LEGAL_SUFFIXES = {
+    'the', 'ltd', 'limited', 'pty', 'inc', 'incorporated', 'corp', 'corporation', 'plc', 'co',
+    'company', 'llc', 'lp', 'sa', 'ag', 'nv', 'se', 'holdings', 'group', 'and', 'of'
+}
+
+# Tokens listed by more companies than this are too common to find candidates with
+MAX_TOKEN_FREQUENCY = 500
+
+# Tokens this similar (0-1) count as the same word, to absorb small spelling differences
+TOKEN_MATCH_SCORE = 0.9
+
+# Added per exchange position, so preferred exchanges only break near-ties
+EXCHANGE_BONUS = 0.02
+
+# Candidates kept per company on the review list
+MAX_REVIEW_CANDIDATES = 3
+
+
+def name_tokens(name: str) -> List[str]:
+    """Lower-case ASCII word tokens of a company name without legal suffixes."""
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii').lower()
+    tokens = re.findall(r'[a-z0-9]+', name.replace('&', ' and '))
+    return [token for token in tokens if token not in LEGAL_SUFFIXES]
+
+
+def _covered(tokens: List[str], other: List[str]) -> bool:
+    """Whether every token has an equal or near-equal token in other."""
+    return all(
+        token in other or any(difflib.SequenceMatcher(None, token, o).ratio() >= TOKEN_MATCH_SCORE for o in other)
+        for token in tokens
+    )
+
+
+def compare_names(key: str, candidate: str) -> Tuple[Optional[str], float]:
+    """('match' | 'review' | None, similarity) for two normalized names.
+
+    Names match when their distinctive tokens pair up both ways. When only one
+    name's tokens are all found in the other ("Cisco" / "Cisco Systems") they may
+    or may not be the same company, so the pair goes to review. Names sharing
+    only some words ("Robert Half" / "Robert Walters") are rejected.
+    """
+    key_tokens, candidate_tokens = key.split(), candidate.split()
+    similarity = difflib.SequenceMatcher(None, key, candidate).ratio()
+    key_covered = _covered(key_tokens, candidate_tokens)
+    candidate_covered = _covered(candidate_tokens, key_tokens)
+    if key_covered and candidate_covered:
+        return 'match', similarity
+    if key_covered or candidate_covered:
+        return 'review', similarity
+    return None, similarity
+
+
+def build_symbol_index(stock_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Inverted index from name token to stock list positions."""
+    entries = [item for item in stock_list if item.get('name') and item.get('symbol')]
+    entries = [item for item in entries if name_tokens(item['name'])]
+    normalized = [' '.join(name_tokens(item['name'])) for item in entries]
+    postings = defaultdict(list)
+    for position, key in enumerate(normalized):
+        for token in set(key.split()):
+            postings[token].append(position)
+    return {'entries': entries, 'normalized': normalized, 'postings': dict(postings)}
+
+
+def match_company(company: str, index: Dict[str, Any],
+                  preferred_exchanges: List[str]) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """(best matching stock list entry or None, candidates that need a manual review)."""
+    tokens = name_tokens(company)
+    if not tokens:
+        return None, []
+    key = ' '.join(tokens)
+
+    candidates = set()
+    for token in tokens:
+        positions = index['postings'].get(token, [])
+        if len(positions) <= MAX_TOKEN_FREQUENCY:
+            candidates.update(positions)
+
+    exchange_rank = {exchange: rank for rank, exchange in enumerate(preferred_exchanges)}
+    best, best_score = None, 0.0
+    review = []
+    # Sorted so ties always resolve the same way
+    for position in sorted(candidates):
+        verdict, similarity = compare_names(key, index['normalized'][position])
+        if verdict is None:
+            continue
+        entry = index['entries'][position]
+        rank = exchange_rank.get(entry.get('exchangeShortName'), len(preferred_exchanges))
+        score = similarity + EXCHANGE_BONUS * (len(preferred_exchanges) - rank)
+        if verdict == 'review':
+            review.append((-score, position, dict(entry, match_score=round(similarity, 3))))
+        elif score > best_score:
+            best, best_score = entry, score
+
+    if best is not None:
+        return best, []
+    return None, [entry for _, _, entry in sorted(review)[:MAX_REVIEW_CANDIDATES]]
+
+
+def match_companies(companies: List[str], index: Dict[str, Any], preferred_exchanges: List[str]
+                    ) -> Tuple[Dict[str, Optional[Dict[str, Any]]], Dict[str, List[Dict[str, Any]]]]:
+    """Match every company against the symbol index in one local pass.
+
+    Returns the accepted matches and, for companies without one, the ambiguous
+    candidates to review by hand.
+    """
+    matches, review = {}, {}
+    for company in companies:
+        matches[company], candidates = match_company(company, index, preferred_exchanges)
+        if candidates:
+            review[company] = candidates
+    return matches, review
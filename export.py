@@ -0,0 +1,94 @@
+import io
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+# Upper bounds per CSV chunk / Arrow record batch / Parquet row group; wide rows (long
+# descriptions and JSON columns) get fewer rows so each chunk stays around EXPORT_CHUNK_BYTES
+EXPORT_CHUNK_ROWS = 10000
+EXPORT_CHUNK_BYTES = 8 * 1024 * 1024
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows')
+}
+
+
+def build_export_table(companies):
+    """The company table as Arrow, converted once so exports only slice existing buffers."""
+    table = pa.Table.from_pandas(companies, preserve_index=False)
+    return table.replace_schema_metadata(None)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes to the streaming response instead of keeping them."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _batches(table, chunk_rows):
+    # Slices share the table's buffers, so only the chunk being encoded is copied
+    if table.num_rows:
+        row_bytes = max(table.nbytes / table.num_rows, 1)
+        chunk_rows = max(1, min(chunk_rows, int(EXPORT_CHUNK_BYTES / row_bytes)))
+    for start in range(0, table.num_rows, chunk_rows):
+        yield table.slice(start, chunk_rows)
+
+
+def stream_csv(table, chunk_rows=EXPORT_CHUNK_ROWS):
+    sink = _ChunkSink()
+    with pa_csv.CSVWriter(sink, table.schema) as writer:
+        for chunk in _batches(table, chunk_rows):
+            writer.write_table(chunk)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def stream_arrow(table, chunk_rows=EXPORT_CHUNK_ROWS):
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for chunk in _batches(table, chunk_rows):
+            writer.write_table(chunk)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def stream_parquet(table, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Parquet written one row group at a time; the footer follows the last row group."""
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, table.schema) as writer:
+        for chunk in _batches(table, chunk_rows):
+            writer.write_table(chunk, row_group_size=chunk_rows)
+            yield sink.drain()
+    yield sink.drain()
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'parquet': stream_parquet,
+    'arrow': stream_arrow
+}
+
+
+def export_rows(table, mask=None, columns=None):
+    """Rows where mask is true and the requested columns (all by default)."""
+    if mask is not None and not mask.all():
+        table = table.filter(pa.array(mask))
+    if columns:
+        table = table.select(columns)
+    return table
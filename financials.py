@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from data_collection.process_financial_data import DERIVED_METRICS, fiscal_years
+
+# Reported figures returned in each company's time series, next to the derived metrics
+SERIES_FIGURES = [
+    'revenue', 'grossProfit', 'operatingIncome', 'netIncome', 'ebitda', 'operatingCashFlow',
+    'freeCashFlow', 'capitalExpenditure', 'totalAssets', 'totalDebt', 'totalStockholdersEquity'
+]
+
+# Peer group name -> company column; 'all' compares against every company with financials
+FINANCIAL_PEER_GROUPS = {
+    'all': None,
+    'industry': 'industry',
+    'country': 'hq_country'
+}
+
+
+def _clean(value):
+    if value is None or pd.isna(value):
+        return None
+    return float(value)
+
+
+def _text(value):
+    return None if value is None or pd.isna(value) else str(value)
+
+
+def align_company_names(financials, df):
+    """Rename financial rows from the collector's input "Company Name" to the LinkedIn name.
+
+    Every other endpoint and the dashboard use the LinkedIn name (e.g. CrowdStrike, not
+    Crowdstrike). Companies without a profile keep their input name.
+    """
+    profiles = df.dropna(subset=['name']).drop_duplicates('Company Name')
+    names = financials['company_name'].map(profiles.set_index('Company Name')['name'])
+    return financials.assign(company_name=names.fillna(financials['company_name']))
+
+
+def build_financial_series(financials):
+    """Per-company time series (oldest first), keyed by company name."""
+    financials = financials.assign(year=fiscal_years(financials)).sort_values(['company_name', 'date'])
+    series = {}
+    for name, rows in financials.groupby('company_name', sort=False):
+        first = rows.iloc[0]
+        series[name] = {
+            'company': name,
+            'symbol': _text(first.get('symbol')),
+            'currency': _text(first.get('reportedCurrency')) or _text(first.get('currency')),
+            'series': [
+                {
+                    'year': int(row['year']) if pd.notna(row['year']) else None,
+                    'date': row['date'].strftime('%Y-%m-%d') if pd.notna(row['date']) else None,
+                    **{column: _clean(row[column]) for column in SERIES_FIGURES + DERIVED_METRICS}
+                }
+                for row in rows.to_dict(orient='records')
+            ]
+        }
+    return series
+
+
+def build_financial_peer_index(financials, companies):
+    """Sorted derived-metric values per (peer group, group label, year), for percentile lookups.
+
+    Companies are placed in peer groups through the company table; financial rows whose
+    company is not in it are only part of the 'all' group.
+    """
+    profile = companies.set_index('name')
+    financials = financials.assign(year=fiscal_years(financials))
+    labels = {}
+    index = {}
+    for group, column in FINANCIAL_PEER_GROUPS.items():
+        if column is None:
+            keys = pd.Series('all', index=financials.index)
+        else:
+            keys = financials['company_name'].map(profile[column])
+        labels[group] = dict(zip(financials['company_name'], keys))
+
+        index[group] = {}
+        for (label, year), rows in financials.groupby([keys, financials['year']], dropna=True):
+            index[group][(label, int(year))] = {
+                metric: np.sort(rows[metric].dropna().to_numpy(dtype=np.float64)) for metric in DERIVED_METRICS
+            }
+    return {'labels': labels, 'values': index}
+
+
+def compare_to_peers(series, peer_index, metric, group='industry'):
+    """Each year's value of one metric with the peer median, peer count and percentile (0-100)."""
+    label = peer_index['labels'][group].get(series['company'])
+    years = []
+    for point in series['series']:
+        value = point[metric]
+        peers = peer_index['values'][group].get((label, point['year'])) if label is not None and pd.notna(label) else None
+        peer_values = peers[metric] if peers is not None else np.array([])
+        years.append({
+            'year': point['year'],
+            'value': value,
+            'peer_count': int(len(peer_values)),
+            'peer_median': _clean(np.median(peer_values)) if len(peer_values) else None,
+            # Share of peers with an equal or lower value, as in the company percentiles
+            'percentile': (round(100 * np.searchsorted(peer_values, value, side='right') / len(peer_values), 1)
+                           if value is not None and len(peer_values) else None)
+        })
+    return {
+        'company': series['company'],
+        'metric': metric,
+        'group': group,
+        'peer_group': None if label is None or pd.isna(label) else str(label),
+        'years': years
+    }
@@ -0,0 +1,254 @@
+"""Replay dashboard sessions against the Flask backend under gunicorn and report throughput and latency.
+
+Sessions are recorded from real dashboard use by running Streamlit with
+AUSJOBS_RECORD_SESSION set (see dashboard/api.py):
+
+    AUSJOBS_API_URL=http://127.0.0.1:5050/api AUSJOBS_RECORD_SESSION=sessions.jsonl streamlit run visualization.py
+
+Without recordings, built-in flows that make the same calls as the Company
+Comparison, Geography and overview pages are used. Each configuration starts its
+own gunicorn, replays sessions from N concurrent users for a fixed duration and
+reports requests/s, latency percentiles and error rate:
+
+    python loadtest.py --sessions sessions.jsonl --configs sync:1 sync:4 gthread:2x8 --concurrency 1 8 32
+    python loadtest.py --url http://127.0.0.1:5050/api   # against an already running backend
+"""
+import os
+import sys
+import json
+import time
+import random
+import signal
+import argparse
+import threading
+import subprocess
+from collections import defaultdict
+from urllib.parse import quote, urlsplit
+import numpy as np
+import requests
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIGS = ['sync:1', 'sync:4', 'gthread:1x8', 'gthread:4x4']
+DEFAULT_CONCURRENCY = [1, 8, 32]
+DEFAULT_DURATION = 20
+STARTUP_TIMEOUT = 120
+REQUEST_TIMEOUT = 30
+# Recorded pauses longer than this are user idling, not think time
+MAX_THINK_SECONDS = 5.0
+
+
+def parse_config(text):
+    """'sync:4' -> 4 sync workers; 'gthread:2x8' -> 2 gthread workers with 8 threads each."""
+    worker_class, _, size = text.partition(':')
+    if worker_class not in ('sync', 'gthread'):
+        raise argparse.ArgumentTypeError(f"Unknown worker class in {text!r}; use sync or gthread")
+    workers, _, threads = (size or '1').partition('x')
+    return {'name': text, 'worker_class': worker_class, 'workers': int(workers), 'threads': int(threads or 1)}
+
+
+def load_sessions(paths):
+    """Recorded sessions as lists of (think seconds before the call, path)."""
+    calls = defaultdict(list)
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    calls[(path, entry['session'])].append((entry['time'], entry['path']))
+
+    sessions = []
+    for entries in calls.values():
+        entries.sort()
+        previous = entries[0][0]
+        session = []
+        for timestamp, call in entries:
+            session.append((min(timestamp - previous, MAX_THINK_SECONDS), call))
+            previous = timestamp
+        sessions.append(session)
+    return sessions
+
+
+def builtin_sessions(api_url, count=20, seed=0):
+    """Page flows mirroring the dashboard: comparison browsing, geography toggling and the overview pages."""
+    names = [name for name in requests.get(f"{api_url}/company_names", timeout=REQUEST_TIMEOUT).json()
+             if isinstance(name, str)]
+    rng = random.Random(seed)
+    sessions = []
+    for _ in range(count):
+        browsing = [(0.0, 'company_names')]
+        for name in rng.sample(names, min(5, len(names))):
+            browsing += [(1.0, f'company_details/{quote(name)}'), (0.0, f'similar/{quote(name)}?k=5')]
+        sessions.append(browsing)
+
+        geography = [(0.0, 'geographical_distribution')]
+        for zoom in rng.sample(range(0, 9), 4):
+            geography += [(1.0, f'city_map?zoom={zoom}'), (1.0, 'geographical_distribution')]
+        sessions.append(geography)
+
+        sessions.append([(0.0, 'company_size_distribution'), (1.0, 'industry_breakdown'),
+                         (1.0, 'founded_year_timeline'), (1.0, 'top_k?metric=follower_count&k=10'),
+                         (1.0, 'specialties_wordcloud'), (1.0, 'company_type_distribution'),
+                         (1.0, 'funding_analysis'), (1.0, 'employee_follower_correlation')])
+    return sessions
+
+
+def endpoint_of(path):
+    # Group e.g. company_details/<name> and logo/<id> under one endpoint
+    return urlsplit(path).path.split('/')[0]
+
+
+def run_load(api_url, sessions, concurrency, duration, think_scale=0.0, seed=0):
+    """Replay sessions from concurrency users for duration seconds; returns [(endpoint, seconds, ok)]."""
+    results = []
+    results_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def user(index):
+        rng = random.Random(seed + index)
+        http = requests.Session()
+        local = []
+        while time.perf_counter() < deadline:
+            for think, path in rng.choice(sessions):
+                if think and think_scale:
+                    time.sleep(think * think_scale)
+                if time.perf_counter() >= deadline:
+                    break
+                start = time.perf_counter()
+                try:
+                    response = http.get(f"{api_url}/{path}", timeout=REQUEST_TIMEOUT)
+                    ok = response.status_code < 400
+                except requests.RequestException:
+                    ok = False
+                local.append((endpoint_of(path), time.perf_counter() - start, ok))
+        with results_lock:
+            results.extend(local)
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def summarize(results, duration):
+    latencies = np.array([seconds for _, seconds, _ in results]) * 1000
+    errors = sum(1 for _, _, ok in results if not ok)
+    if not len(latencies):
+        return {'requests': 0, 'rps': 0.0, 'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None,
+                'error_rate': None}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'requests': len(results),
+        'rps': round(len(results) / duration, 1),
+        'p50_ms': round(float(p50), 1),
+        'p95_ms': round(float(p95), 1),
+        'p99_ms': round(float(p99), 1),
+        'max_ms': round(float(latencies.max()), 1),
+        'error_rate': round(errors / len(results), 4)
+    }
+
+
+def start_backend(config, port):
+    """gunicorn serving app:app with the given worker setup; returns the process once the API answers."""
+    command = [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', f'127.0.0.1:{port}',
+               '--worker-class', config['worker_class'], '--workers', str(config['workers']),
+               '--threads', str(config['threads']), '--timeout', str(REQUEST_TIMEOUT * 2)]
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+    api_url = f'http://127.0.0.1:{port}/api'
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited during startup ({config['name']})")
+        try:
+            if requests.get(f'{api_url}/company_names', timeout=5).status_code == 200:
+                return process, api_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    stop_backend(process)
+    raise RuntimeError(f"Backend did not start within {STARTUP_TIMEOUT}s ({config['name']})")
+
+
+def stop_backend(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def print_report(rows, by_endpoint=False):
+    header = f"{'config':<14} {'users':>5} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}"
+    print(header)
+    for row in rows:
+        summary = row['summary']
+        if not summary['requests']:
+            print(f"{row['config']:<14} {row['concurrency']:>5} {0:>8}")
+            continue
+        print(f"{row['config']:<14} {row['concurrency']:>5} {summary['requests']:>8} {summary['rps']:>8} "
+              f"{summary['p50_ms']:>8} {summary['p95_ms']:>8} {summary['p99_ms']:>8} {summary['max_ms']:>8} "
+              f"{summary['error_rate']:>7.2%}")
+        if by_endpoint:
+            for endpoint, endpoint_summary in sorted(row['endpoints'].items()):
+                print(f"  {endpoint:<28} {endpoint_summary['requests']:>8} {endpoint_summary['p50_ms']:>8} "
+                      f"{endpoint_summary['p95_ms']:>8} {endpoint_summary['p99_ms']:>8} {endpoint_summary['error_rate']:>7.2%}")
+
+
+def sweep(configs, concurrency_levels, duration, session_files=(), url=None, think_scale=0.0, port=5099):
+    """Load results for every configuration and concurrency level."""
+    rows = []
+    targets = [({'name': 'external'}, url)] if url else [(config, None) for config in configs]
+    for config, api_url in targets:
+        process = None
+        if api_url is None:
+            print(f"Starting gunicorn ({config['name']})...")
+            process, api_url = start_backend(config, port)
+        try:
+            sessions = load_sessions(session_files) if session_files else builtin_sessions(api_url)
+            for concurrency in concurrency_levels:
+                results = run_load(api_url, sessions, concurrency, duration, think_scale)
+                by_endpoint = defaultdict(list)
+                for result in results:
+                    by_endpoint[result[0]].append(result)
+                row = {
+                    'config': config['name'],
+                    'concurrency': concurrency,
+                    'summary': summarize(results, duration),
+                    'endpoints': {endpoint: summarize(items, duration) for endpoint, items in by_endpoint.items()}
+                }
+                rows.append(row)
+                print_report([row])
+        finally:
+            if process is not None:
+                stop_backend(process)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the AusJobs backend by replaying dashboard sessions.")
+    parser.add_argument('--sessions', nargs='*', default=[], help="Recorded session files (JSONL); built-in flows if none")
+    parser.add_argument('--configs', nargs='*', type=parse_config, default=[parse_config(c) for c in DEFAULT_CONFIGS],
+                        help="gunicorn setups as worker_class:workers[xthreads], e.g. sync:4 gthread:2x8")
+    parser.add_argument('--concurrency', nargs='*', type=int, default=DEFAULT_CONCURRENCY, help="Concurrent users")
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help="Seconds per configuration and level")
+    parser.add_argument('--think-scale', type=float, default=0.0,
+                        help="Multiplier for recorded pauses between calls (0 replays back to back)")
+    parser.add_argument('--url', help="Test an already running backend (e.g. http://127.0.0.1:5050/api) instead")
+    parser.add_argument('--port', type=int, default=5099, help="Port for the gunicorn started per configuration")
+    parser.add_argument('--by-endpoint', action='store_true', help="Also print latency per endpoint")
+    parser.add_argument('--output', help="Write all results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    rows = sweep(args.configs, args.concurrency, args.duration, args.sessions, args.url, args.think_scale, args.port)
+    print()
+    print_report(rows, by_endpoint=args.by_endpoint)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
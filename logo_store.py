@@ -0,0 +1,125 @@
+import io
+import os
+import json
+import hashlib
+import threading
+import pandas as pd
+from PIL import Image
+
+LOGO_DIR = 'company_images'
+MANIFEST_FILE = os.path.join(LOGO_DIR, 'manifest.json')
+
+# Square variants the API serves; matches the thumbnails written by data_collection/logos.py
+LOGO_SIZES = (64, 128, 200)
+LOGO_QUALITY = 80
+
+# Sprite sheets are one request per list view, so keep them to a sensible number of tiles
+MAX_SPRITE_LOGOS = 100
+
+CONTENT_TYPES = {'.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png',
+                 '.gif': 'image/gif', '.webp': 'image/webp', '.svg': 'image/svg+xml'}
+
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _legacy_company_id(path):
+    # Images saved before the manifest existed are named company_images/<company_id>.<ext>
+    stem = os.path.splitext(os.path.basename(str(path)))[0]
+    return int(stem) if stem.isdigit() else None
+
+
+def fit_square(image, size):
+    """Fit an image into a size x size transparent square."""
+    thumbnail = image.convert('RGBA')
+    thumbnail.thumbnail((size, size), Image.LANCZOS)
+    canvas = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    canvas.paste(thumbnail, ((size - thumbnail.width) // 2, (size - thumbnail.height) // 2))
+    return canvas
+
+
+def encode_webp(image):
+    buffer = io.BytesIO()
+    image.save(buffer, 'WEBP', quality=LOGO_QUALITY)
+    return buffer.getvalue()
+
+
+class LogoStore:
+    """Company logos by company_id, with resized WebP variants rendered once and kept in memory.
+
+    Logos come from the logo collector's manifest when it exists, otherwise from the
+    Image_Path column of the dataset, and are looked up by LinkedIn name. Every logo has a version (its content hash) so
+    URLs that carry it can be cached forever.
+    """
+
+    def __init__(self, companies, manifest_path=MANIFEST_FILE):
+        self.logos = {}
+        self.ids_by_name = {}
+        self._variants = {}
+        self._lock = threading.Lock()
+
+        for name, path in zip(companies['name'], companies['Image_Path']):
+            company_id = _legacy_company_id(path) if pd.notnull(path) else None
+            if company_id is not None and os.path.exists(path):
+                self._add(company_id, name, path, _file_hash(path), {})
+
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            # The manifest is keyed by the collector's input "Company Name"; entries written
+            # before they carried the LinkedIn name are translated through the company table
+            linkedin_names = {}
+            if 'Company Name' in companies:
+                linkedin_names = dict(zip(companies['Company Name'], companies['name']))
+            for input_name, entry in manifest.items():
+                name = entry.get('name') or linkedin_names.get(input_name, input_name)
+                if os.path.exists(entry['original']):
+                    self._add(entry['company_id'], name, entry['original'], entry['hash'],
+                              {int(size): path for size, path in entry.get('thumbnails', {}).items()})
+
+    def _add(self, company_id, name, path, digest, thumbnails):
+        self.logos[company_id] = {'name': name, 'path': path, 'version': digest[:16], 'thumbnails': thumbnails}
+        self.ids_by_name[name] = company_id
+
+    def version(self, company_id):
+        return self.logos[company_id]['version']
+
+    def variant(self, company_id, size=None):
+        """(body, content type) of a logo; size None is the original file."""
+        logo = self.logos[company_id]
+        key = (company_id, size)
+        with self._lock:
+            cached = self._variants.get(key)
+        if cached is not None:
+            return cached
+
+        if size is None:
+            with open(logo['path'], 'rb') as f:
+                body = f.read()
+            result = (body, CONTENT_TYPES.get(os.path.splitext(logo['path'])[1].lower(), 'application/octet-stream'))
+        elif os.path.exists(logo['thumbnails'].get(size, '')):
+            with open(logo['thumbnails'][size], 'rb') as f:
+                result = (f.read(), 'image/webp')
+        else:
+            with Image.open(logo['path']) as image:
+                result = (encode_webp(fit_square(image, size)), 'image/webp')
+
+        with self._lock:
+            self._variants[key] = result
+        return result
+
+    def sprite(self, company_ids, size):
+        """Horizontal strip of logos; tile i (at x = i * size) is company_ids[i], blank if unknown."""
+        sheet = Image.new('RGBA', (size * len(company_ids), size), (0, 0, 0, 0))
+        for position, company_id in enumerate(company_ids):
+            if company_id in self.logos:
+                body, _ = self.variant(company_id, size)
+                with Image.open(io.BytesIO(body)) as tile:
+                    sheet.paste(fit_square(tile, size), (position * size, 0))
+        return encode_webp(sheet)
+
+    def sprite_version(self, company_ids, size):
+        versions = [self.logos[i]['version'] if i in self.logos else '-' for i in company_ids]
+        return hashlib.sha1(f"{size}:{','.join(versions)}".encode('utf-8')).hexdigest()[:16]
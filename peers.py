@@ -0,0 +1,68 @@
+import pandas as pd
+
+# Detail key -> company column compared against peers
+PEER_METRICS = {
+    'follower_count': 'follower_count',
+    'company_size': 'company_size_on_linkedin',
+    'founded_year': 'founded_year',
+    'num_specialties': 'num_specialties',
+    'num_countries': 'num_countries'
+}
+
+# Peer group name -> company column that defines the group
+PEER_GROUPS = {
+    'industry': 'industry',
+    'size': 'size_category',
+    'country': 'hq_country'
+}
+
+
+def _clean(value, digits=1):
+    """JSON-friendly float: None for missing values, rounded otherwise."""
+    if value is None or pd.isna(value):
+        return None
+    return round(float(value), digits)
+
+
+def build_peer_stats(companies):
+    """Percentile ranks and peer-group averages for every company, keyed by name.
+
+    Percentiles are 0-100 (share of companies with an equal or lower value) and are
+    computed overall and within each peer group with vectorized groupby rank/transform.
+    """
+    metrics = pd.DataFrame({key: pd.to_numeric(companies[column], errors='coerce')
+                            for key, column in PEER_METRICS.items()})
+
+    overall_percentiles = metrics.rank(pct=True, method='max') * 100
+    overall_averages = metrics.mean()
+
+    group_frames = {}
+    for group, column in PEER_GROUPS.items():
+        keys = companies[column]
+        grouped = metrics.groupby(keys, dropna=True)
+        group_frames[group] = {
+            'label': keys,
+            'peer_count': keys.map(keys.value_counts()),
+            'averages': grouped.transform('mean'),
+            'percentiles': grouped.rank(pct=True, method='max') * 100
+        }
+
+    stats = {}
+    for position, name in enumerate(companies['name']):
+        peers = {}
+        for group, frame in group_frames.items():
+            label = frame['label'].iat[position]
+            if pd.isna(label):
+                continue
+            peers[group] = {
+                'group': str(label),
+                'peer_count': int(frame['peer_count'].iat[position]),
+                'averages': {key: _clean(frame['averages'][key].iat[position]) for key in PEER_METRICS},
+                'percentiles': {key: _clean(frame['percentiles'][key].iat[position]) for key in PEER_METRICS}
+            }
+        stats[name] = {
+            'percentiles': {key: _clean(overall_percentiles[key].iat[position]) for key in PEER_METRICS},
+            'peers': peers
+        }
+
+    return stats, {key: _clean(value) for key, value in overall_averages.items()}
@@ -0,0 +1,337 @@
+"""Run the data pipeline as a DAG of stages with explicit inputs and outputs.
+
+A stage depends on every stage that produces one of its inputs. Stages are
+skipped when the content hashes of their inputs (and their command) are the same
+as on their last successful run and their outputs still exist, so a change only
+re-runs the stages downstream of it. Independent stages run in parallel.
+
+    python pipeline.py                 # run everything that is out of date
+    python pipeline.py financials      # bring one stage (and what it needs) up to date
+    python pipeline.py --dry-run       # show what would run
+    python pipeline.py --force abs     # re-run a stage even if it is up to date
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.path.join(ROOT, '.pipeline_state.json')
+LOG_DIR = os.path.join(ROOT, '.pipeline_logs')
+COLLECTION = 'data_collection'
+
+
+class Publish:
+    """Stage action that copies working outputs (files or directories) into place for the API and the dashboard.
+
+    Its repr lists the pairs, so changing them changes the stage's fingerprint.
+    """
+
+    def __init__(self, pairs):
+        self.pairs = list(pairs)
+
+    def __call__(self):
+        for source, target in self.pairs:
+            source_path, target_path = os.path.join(ROOT, source), os.path.join(ROOT, target)
+            if os.path.isdir(source_path):
+                # Merged into the target, so files only the target has (older logos) stay
+                shutil.copytree(source_path, target_path, dirs_exist_ok=True)
+            else:
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                shutil.copyfile(source_path, target_path)
+
+    def __repr__(self):
+        return f"Publish({self.pairs!r})"
+
+
+# Stage name -> command (argv run in cwd, a Python callable, or None for a manual step),
+# inputs and outputs as paths relative to the repository root (files or directories).
+STAGES = {
+    'profiles': {
+        'command': [sys.executable, 'company.py', '--input', '../data/processed_data/busa3021.xlsx'],
+        'cwd': COLLECTION,
+        'inputs': ['data/processed_data/busa3021.xlsx', f'{COLLECTION}/company.py', f'{COLLECTION}/profile_schema.py'],
+        'outputs': [f'{COLLECTION}/company_information_full.xlsx', f'{COLLECTION}/company_tables']
+    },
+    'logos': {
+        # Rewrites the workbook in place with each company's image path, so it is an output
+        # too and everything reading the workbook runs after logos
+        'command': [sys.executable, 'logos.py'],
+        'cwd': COLLECTION,
+        'inputs': [f'{COLLECTION}/company_information_full.xlsx', f'{COLLECTION}/logos.py'],
+        'outputs': [f'{COLLECTION}/company_images', f'{COLLECTION}/company_information_full.xlsx']
+    },
+    'clean': {
+        'command': None,
+        'note': f"Run {COLLECTION}/data_processing.ipynb to write {COLLECTION}/cleaned_state_data.xlsx",
+        # The workbook as logos leaves it, with the image paths the cleaning step needs
+        'inputs': [f'{COLLECTION}/company_information_full.xlsx', f'{COLLECTION}/company_images/manifest.json'],
+        'outputs': [f'{COLLECTION}/cleaned_state_data.xlsx']
+    },
+    'financials': {
+        'command': [sys.executable, 'financial_data.py'],
+        'cwd': COLLECTION,
+        'inputs': [f'{COLLECTION}/cleaned_state_data.xlsx', f'{COLLECTION}/financial_data.py',
+                   f'{COLLECTION}/symbol_master.py'],
+        'outputs': [f'{COLLECTION}/financial_data_output/consolidated_financial_data.csv']
+    },
+    'process_financials': {
+        'command': [sys.executable, 'process_financial_data.py'],
+        'cwd': COLLECTION,
+        'inputs': [f'{COLLECTION}/financial_data_output/consolidated_financial_data.csv',
+                   f'{COLLECTION}/process_financial_data.py'],
+        'outputs': [f'{COLLECTION}/processed_financial_data.parquet']
+    },
+    'abs': {
+        'command': [sys.executable, 'abs_earnings.py'],
+        'cwd': COLLECTION,
+        'inputs': ['data/ABS', f'{COLLECTION}/abs_earnings.py'],
+        'outputs': ['data/processed_data/abs_earnings.parquet']
+    },
+    'publish': {
+        'command': Publish([
+            (f'{COLLECTION}/cleaned_state_data.xlsx', 'data/processed_data/cleaned_state_data.xlsx'),
+            (f'{COLLECTION}/financial_data_output/consolidated_financial_data.csv',
+             'data/financial_data_output/consolidated_financial_data.csv'),
+            (f'{COLLECTION}/processed_financial_data.parquet', 'data/processed_data/processed_financial_data.parquet'),
+            # Logos, thumbnails and manifest.json, where logo_store.py reads them
+            (f'{COLLECTION}/company_images', 'company_images'),
+        ]),
+        'inputs': [f'{COLLECTION}/cleaned_state_data.xlsx',
+                   f'{COLLECTION}/financial_data_output/consolidated_financial_data.csv',
+                   f'{COLLECTION}/processed_financial_data.parquet',
+                   f'{COLLECTION}/company_images'],
+        'outputs': ['data/processed_data/cleaned_state_data.xlsx',
+                    'data/financial_data_output/consolidated_financial_data.csv',
+                    'data/processed_data/processed_financial_data.parquet',
+                    'company_images']
+    },
+    'csv_exports': {
+        # Same files /api/create_csv_files writes, produced without starting the server
+        'command': [sys.executable, '-c',
+                    "import sys, app; sys.exit(app.app.test_client().get('/api/create_csv_files').status_code != 200)"],
+        'cwd': '.',
+        'inputs': ['data/processed_data/cleaned_state_data.xlsx', 'app.py'],
+        'outputs': ['company_data.csv', 'world_data.csv', 'australia_data.csv', 'city_locations.csv']
+    },
+}
+
+
+def path_hash(path):
+    """Content hash of a file, or of every file under a directory; None if it does not exist."""
+    full = os.path.join(ROOT, path)
+    if os.path.isfile(full):
+        with open(full, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    if os.path.isdir(full):
+        digest = hashlib.sha256()
+        for directory, _, files in sorted(os.walk(full)):
+            for name in sorted(files):
+                file_path = os.path.join(directory, name)
+                digest.update(os.path.relpath(file_path, full).encode('utf-8'))
+                with open(file_path, 'rb') as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+        return digest.hexdigest()
+    return None
+
+
+def fingerprint(stage):
+    """Hash of a stage's command and the content of all its inputs."""
+    command = stage['command']
+    if callable(command):
+        # Functions are described by name; callable objects such as Publish by their repr
+        described = getattr(command, '__qualname__', None) or repr(command)
+    else:
+        described = command
+    payload = {'command': described, 'inputs': {path: path_hash(path) for path in stage['inputs']}}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def output_hash(stage):
+    return hashlib.sha256(json.dumps([path_hash(path) for path in stage['outputs']]).encode('utf-8')).hexdigest()
+
+
+def _covers(output, path):
+    return path == output or path.startswith(output.rstrip('/') + '/')
+
+
+def dependencies(stages=STAGES):
+    """Stage -> the stages producing any of its inputs."""
+    deps = {}
+    for name, stage in stages.items():
+        deps[name] = {other for other, producer in stages.items() if other != name
+                      for output in producer['outputs'] for path in stage['inputs'] if _covers(output, path)}
+    return deps
+
+
+def topological_order(deps):
+    order, done = [], set()
+
+    def visit(name, trail):
+        if name in trail:
+            raise ValueError(f"Pipeline cycle: {' -> '.join(trail + [name])}")
+        if name not in done:
+            for dep in sorted(deps[name]):
+                visit(dep, trail + [name])
+            done.add(name)
+            order.append(name)
+
+    for name in sorted(deps):
+        visit(name, [])
+    return order
+
+
+def with_upstream(targets, deps):
+    selected, stack = set(), list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in selected:
+            selected.add(name)
+            stack.extend(deps[name])
+    return selected
+
+
+def load_state():
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state):
+    tmp_path = f'{STATE_FILE}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def outputs_exist(stage):
+    return all(os.path.exists(os.path.join(ROOT, path)) for path in stage['outputs'])
+
+
+def run_stage(name, stage):
+    """Run one stage; returns (succeeded, seconds). Command output goes to .pipeline_logs/<stage>.log."""
+    start = time.perf_counter()
+    command = stage['command']
+    if callable(command):
+        try:
+            command()
+            return True, time.perf_counter() - start
+        except Exception as exc:
+            print(f"[{name}] failed: {exc}")
+            return False, time.perf_counter() - start
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f'{name}.log')
+    with open(log_path, 'w', encoding='utf-8') as log:
+        result = subprocess.run(command, cwd=os.path.join(ROOT, stage.get('cwd', '.')),
+                                stdout=log, stderr=subprocess.STDOUT)
+    if result.returncode != 0:
+        print(f"[{name}] exited with {result.returncode}; see {os.path.relpath(log_path, ROOT)}")
+    return result.returncode == 0, time.perf_counter() - start
+
+
+def run(targets=None, force=(), jobs=4, dry_run=False, stages=STAGES):
+    """Bring the target stages (default: all) and their upstream stages up to date.
+
+    Returns {stage: (status, seconds)} where status is ran, skipped, manual, stale,
+    failed, blocked or would run (dry run).
+    """
+    deps = dependencies(stages)
+    order = topological_order(deps)
+    selected = with_upstream(targets or list(stages), deps)
+    state = load_state()
+    results = {}
+    pending = [name for name in order if name in selected]
+    running = {}
+
+    def finish(name, status, seconds=0.0):
+        results[name] = (status, seconds)
+        print(f"[{name}] {status} ({seconds:.1f}s)")
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while pending or running:
+            for name in list(pending):
+                if any(dep not in results for dep in deps[name] if dep in selected):
+                    continue
+                pending.remove(name)
+                stage = stages[name]
+                upstream = [results[dep][0] for dep in deps[name] if dep in selected]
+                # A stale manual step has not caught up with its inputs, so its output is outdated too
+                if any(status in ('failed', 'blocked', 'stale') for status in upstream):
+                    finish(name, 'blocked')
+                    continue
+
+                current = fingerprint(stage)
+                up_to_date = state.get(name) == current and outputs_exist(stage)
+                if stage['command'] is None:
+                    # Manual steps cannot be run; accept their output unless the inputs changed without it
+                    produced = output_hash(stage)
+                    if not outputs_exist(stage):
+                        print(f"[{name}] missing output: {stage['note']}")
+                        finish(name, 'blocked')
+                    elif not up_to_date and state.get(f'{name}:outputs') == produced:
+                        print(f"[{name}] inputs changed since the output was written: {stage['note']}")
+                        finish(name, 'stale')
+                    else:
+                        state[name], state[f'{name}:outputs'] = current, produced
+                        finish(name, 'manual')
+                elif up_to_date and name not in force:
+                    finish(name, 'skipped')
+                elif dry_run or any(status == 'would run' for status in upstream):
+                    finish(name, 'would run')
+                else:
+                    print(f"[{name}] running")
+                    running[executor.submit(run_stage, name, stage)] = name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                succeeded, seconds = future.result()
+                if succeeded:
+                    # Hashed after the run, so stages that update their own inputs do not re-run forever
+                    state[name] = fingerprint(stages[name])
+                    save_state(state)
+                finish(name, 'ran' if succeeded else 'failed', seconds)
+
+    if not dry_run:
+        save_state(state)
+    return results
+
+
+def report(results):
+    print("\nStage                 Status      Seconds")
+    for name, (status, seconds) in results.items():
+        print(f"{name:<21} {status:<11} {seconds:7.1f}")
+    print(f"{'total':<21} {'':<11} {sum(seconds for _, seconds in results.values()):7.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the AusJobs data pipeline, skipping up-to-date stages.")
+    parser.add_argument('stages', nargs='*', metavar='STAGE',
+                        help=f"Stages to bring up to date, with what they depend on (default: all). One of: {', '.join(STAGES)}")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-run the named stages (or every stage if none are named) even if up to date")
+    parser.add_argument('--jobs', type=int, default=4, help="Stages to run in parallel")
+    parser.add_argument('--dry-run', action='store_true', help="Show which stages would run without running them")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.stages if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    force = set(args.stages or STAGES) if args.force else set()
+    results = run(args.stages or None, force=force, jobs=args.jobs, dry_run=args.dry_run)
+    report(results)
+    return 1 if any(status in ('failed', 'blocked', 'stale') for status, _ in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""On-demand profiling of single backend requests, written as flamegraph-compatible files.
+
+Off by default; nothing is hooked into the app unless one of these is set:
+
+    AUSJOBS_PROFILE_ROUTES=geographical_distribution,specialties_wordcloud   (or *)
+        profile every request to these endpoints
+    AUSJOBS_PROFILE_TOKEN=<secret>
+        profile requests sent with the header `X-Profile: <secret>` or `?_profile=<secret>`;
+        add `X-Profile-Return: 1` / `&_profile_return=1` to get the profile back instead of the response
+
+AUSJOBS_PROFILE_MODE picks `sample` (default: stack samples in folded format, for
+flamegraph.pl, speedscope or inferno) or `cprofile` (a pstats .prof file, for
+snakeviz or flameprof). Files go to AUSJOBS_PROFILE_DIR (default profiles/) and are
+named <endpoint>_<dataset version>_<timestamp>.<ext>.
+"""
+import os
+import sys
+import hmac
+import time
+import cProfile
+import threading
+from collections import Counter
+
+PROFILE_DIR = os.getenv('AUSJOBS_PROFILE_DIR', 'profiles')
+PROFILE_MODE = os.getenv('AUSJOBS_PROFILE_MODE', 'sample')
+PROFILE_ROUTES = {route.strip() for route in os.getenv('AUSJOBS_PROFILE_ROUTES', '').split(',') if route.strip()}
+PROFILE_TOKEN = os.getenv('AUSJOBS_PROFILE_TOKEN', '')
+SAMPLE_INTERVAL = float(os.getenv('AUSJOBS_PROFILE_INTERVAL', '0.001'))
+
+EXTENSIONS = {'sample': 'folded', 'cprofile': 'prof'}
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Sampler:
+    """Samples one thread's Python stack on a background thread and counts identical stacks."""
+
+    def __init__(self, thread_id=None, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def write(self, path):
+        """Folded stacks, one `outer;...;inner count` line per distinct stack."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class _CProfiler:
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+        return self
+
+    def stop(self):
+        self.profile.disable()
+        return self
+
+    def write(self, path):
+        self.profile.dump_stats(path)
+
+
+def make_profiler(mode=PROFILE_MODE):
+    return _CProfiler() if mode == 'cprofile' else Sampler()
+
+
+def profile_path(tag, version, mode=PROFILE_MODE, directory=PROFILE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime('%Y%m%dT%H%M%S') + f'{time.time() % 1:.3f}'[1:]
+    return os.path.join(directory, f"{tag}_{version}_{stamp}.{EXTENSIONS.get(mode, 'folded')}")
+
+
+def _authorized(value):
+    return bool(PROFILE_TOKEN) and bool(value) and hmac.compare_digest(value, PROFILE_TOKEN)
+
+
+def install_request_profiler(app, version):
+    """Profile single requests of a Flask app when configured; a no-op otherwise."""
+    if not PROFILE_ROUTES and not PROFILE_TOKEN:
+        return
+
+    from flask import g, request, send_file
+
+    @app.before_request
+    def start_request_profile():
+        by_route = '*' in PROFILE_ROUTES or request.endpoint in PROFILE_ROUTES
+        by_flag = _authorized(request.headers.get('X-Profile') or request.args.get('_profile'))
+        if by_route or by_flag:
+            g.profiler = make_profiler().start()
+
+    @app.after_request
+    def finish_request_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        # Streamed bodies are generated after this point, so only the view itself is covered
+        profiler.stop()
+        path = profile_path(request.endpoint or 'unknown', version)
+        profiler.write(path)
+
+        wants_profile = request.headers.get('X-Profile-Return') == '1' or request.args.get('_profile_return') == '1'
+        if wants_profile and _authorized(request.headers.get('X-Profile') or request.args.get('_profile')):
+            profiled_status = response.status_code
+            mimetype = 'text/plain' if path.endswith('.folded') else 'application/octet-stream'
+            response = send_file(os.path.abspath(path), mimetype=mimetype, as_attachment=True,
+                                 download_name=os.path.basename(path))
+            response.headers['X-Profiled-Status'] = str(profiled_status)
+        response.headers['X-Profile-File'] = os.path.basename(path)
+        return response
+
+    @app.teardown_request
+    def stop_request_profile(error=None):
+        # after_request is skipped when the view raises
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()
@@ -0,0 +1,127 @@
+import json
+import numpy as np
+import pandas as pd
+
+# Query parameter -> company column, shared by filters and group_by
+COMPANY_FIELDS = {
+    'industry': 'industry',
+    'country': 'hq_country',
+    'state': 'hq_state',
+    'city': 'hq_city',
+    'company_type': 'company_type',
+    'size': 'size_category'
+}
+
+SIZE_BINS = [-np.inf, 30, 100, 500, np.inf]
+SIZE_LABELS = ["Micro (< 30)", "Small (30-99)", "Medium (100-499)", "Large (500+)"]
+
+
+def size_categories(sizes):
+    """Bucket employee counts into the same size categories as the size distribution."""
+    sizes = pd.to_numeric(sizes, errors='coerce')
+    return pd.cut(sizes, bins=SIZE_BINS, labels=SIZE_LABELS, right=False).astype(object)
+
+
+def count_specialties(specialties):
+    if pd.isna(specialties):
+        return 0
+    return len(str(specialties).split(','))
+
+
+def count_countries(locations):
+    if pd.isna(locations):
+        return 0
+    try:
+        # Try parsing as JSON
+        locations_list = json.loads(locations)
+    except json.JSONDecodeError:
+        # If not JSON, try splitting by comma
+        return len(set(str(locations).split(',')))
+
+    if isinstance(locations_list, list):
+        return len(set(loc.get('country') for loc in locations_list if isinstance(loc, dict) and 'country' in loc))
+    else:
+        return 1  # If it's not a list, assume it's a single location
+
+
+def build_company_table(df):
+    """One row per company name with the derived columns the query endpoints use."""
+    companies = df.drop_duplicates('name').reset_index(drop=True)
+    companies['size_category'] = size_categories(companies['company_size_on_linkedin'])
+    companies['num_specialties'] = companies['specialities'].apply(count_specialties)
+    companies['num_countries'] = companies['locations'].apply(count_countries)
+    return companies
+
+
+def build_ranking_index(companies):
+    """Precompute numeric arrays and group layouts so top-k queries never sort the table."""
+    numeric_columns = companies.select_dtypes(include=[np.number]).columns
+    values = {column: companies[column].to_numpy(dtype=np.float64) for column in numeric_columns}
+
+    groups = {}
+    for field, column in COMPANY_FIELDS.items():
+        codes, labels = pd.factorize(companies[column])
+        # Row ids ordered by group, so each group is one contiguous slice
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+        groups[field] = {
+            'labels': labels,
+            'slices': [order[bounds[i]:bounds[i + 1]] for i in range(len(labels))]
+        }
+
+    return {'values': values, 'groups': groups}
+
+
+def filter_mask(companies, args):
+    """Boolean mask for the filter query parameters (comma-separated values allowed)."""
+    mask = np.ones(len(companies), dtype=bool)
+    for field, column in COMPANY_FIELDS.items():
+        raw = args.get(field)
+        if raw:
+            wanted = [value.strip() for value in raw.split(',') if value.strip()]
+            mask &= companies[column].isin(wanted).to_numpy()
+    return mask
+
+
+def top_k_indices(values, rows, k, ascending=False):
+    """Row ids of the k best values among rows, best first.
+
+    Uses argpartition, so the cost is linear in len(rows) plus k log k to order the winners.
+    """
+    scores = values[rows]
+    keep = ~np.isnan(scores)
+    rows, scores = rows[keep], scores[keep]
+    if not ascending:
+        scores = -scores
+    if len(rows) > k:
+        best = np.argpartition(scores, k - 1)[:k]
+        rows, scores = rows[best], scores[best]
+    return rows[np.argsort(scores, kind='stable')]
+
+
+def top_k(companies, index, metric, k, group_by=None, mask=None, ascending=False, fields=('name', 'industry')):
+    """Top k companies by a numeric metric, overall or within each group.
+
+    Returns a list of records, or a dict of group label -> records when group_by is set.
+    """
+    values = index['values'][metric]
+    if mask is None:
+        mask = np.ones(len(companies), dtype=bool)
+
+    def records(rows):
+        result = companies.loc[rows, list(fields)].astype(object).where(lambda frame: frame.notna(), None)
+        result[metric] = values[rows]
+        result.insert(0, 'rank', np.arange(1, len(rows) + 1))
+        return result.to_dict(orient='records')
+
+    if group_by is None:
+        return records(top_k_indices(values, np.flatnonzero(mask), k, ascending))
+
+    grouped = {}
+    group = index['groups'][group_by]
+    for label, rows in zip(group['labels'], group['slices']):
+        rows = rows[mask[rows]]
+        best = top_k_indices(values, rows, k, ascending)
+        if len(best):
+            grouped[str(label)] = records(best)
+    return grouped
@@ -0,0 +1,131 @@
+import re
+import numpy as np
+import pandas as pd
+from collections import Counter
+
+# Company column -> weight its term counts get in BM25 (matches in the name count most)
+SEARCH_FIELDS = {
+    'name': 3,
+    'specialities': 2,
+    'tagline': 1,
+    'description': 1
+}
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+[+#]*")
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'has', 'have', 'in', 'into',
+    'is', 'it', 'its', 'of', 'on', 'or', 'our', 'that', 'the', 'their', 'this', 'to', 'us', 'we',
+    'were', 'with', 'you', 'your'
+}
+
+# Raw token -> index term (None for stopwords); the vocabulary is small, so each word is stemmed once
+_terms = {}
+
+
+def _stem(token):
+    # Light plural folding so "services" finds "service"; leaves words like "business" alone
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def _term(token):
+    term = _terms.get(token, False)
+    if term is False:
+        term = _terms[token] = None if token in STOPWORDS else _stem(token)
+    return term
+
+
+def tokenize(text):
+    """Lowercased, stemmed word tokens without stopwords ("we're" -> "were" -> dropped)."""
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return []
+    terms = map(_term, TOKEN_PATTERN.findall(str(text).lower().replace("'", '').replace('’', '')))
+    return [term for term in terms if term is not None]
+
+
+def build_search_index(companies, version=None):
+    """Inverted index over the SEARCH_FIELDS of the company table.
+
+    Postings are stored CSR-style: the rows and weighted term frequencies of term t are
+    doc_ids[offsets[t]:offsets[t + 1]] and term_freqs[...], with rows ascending.
+    """
+    terms = {}
+    term_ids, doc_ids, term_freqs = [], [], []
+    doc_lengths = np.zeros(len(companies), dtype=np.float32)
+
+    columns = [companies[column].tolist() if column in companies else [None] * len(companies)
+               for column in SEARCH_FIELDS]
+    weights = list(SEARCH_FIELDS.values())
+    for row, values in enumerate(zip(*columns)):
+        counts = Counter()
+        for value, weight in zip(values, weights):
+            field_counts = Counter(tokenize(value))
+            if weight != 1:
+                field_counts = {token: count * weight for token, count in field_counts.items()}
+            counts.update(field_counts)
+        doc_lengths[row] = sum(counts.values())
+        for token, count in counts.items():
+            term_ids.append(terms.setdefault(token, len(terms)))
+            doc_ids.append(row)
+            term_freqs.append(count)
+
+    term_ids = np.asarray(term_ids, dtype=np.int32)
+    order = np.lexsort((np.asarray(doc_ids, dtype=np.int32), term_ids))
+    doc_freqs = np.bincount(term_ids, minlength=len(terms))
+    offsets = np.concatenate([[0], np.cumsum(doc_freqs)]).astype(np.int64)
+
+    n_docs = len(companies)
+    avg_length = float(doc_lengths.mean()) if n_docs else 0.0
+    return {
+        'version': version,
+        'terms': terms,
+        'offsets': offsets,
+        'doc_ids': np.asarray(doc_ids, dtype=np.int32)[order],
+        'term_freqs': np.asarray(term_freqs, dtype=np.float32)[order],
+        'idf': np.log1p((n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32),
+        # Per-row BM25 length normalization, K1 * (1 - B + B * length / average length)
+        'length_norm': (BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / max(avg_length, 1e-9))).astype(np.float32)
+    }
+
+
+def bm25_scores(index, query):
+    """BM25 score of every company for the query (0 where no query term occurs), and the terms used."""
+    scores = np.zeros(len(index['length_norm']), dtype=np.float32)
+    # Repeated query terms are counted once
+    query_terms = list(dict.fromkeys(token for token in tokenize(query) if token in index['terms']))
+    length_norm = index['length_norm']
+    for token in query_terms:
+        term = index['terms'][token]
+        start, end = index['offsets'][term], index['offsets'][term + 1]
+        rows, freqs = index['doc_ids'][start:end], index['term_freqs'][start:end]
+        scores[rows] += index['idf'][term] * freqs * (BM25_K1 + 1) / (freqs + length_norm[rows])
+    return scores, query_terms
+
+
+def search(companies, index, query, k=10, mask=None, fields=('name', 'industry')):
+    """Top k companies for a free-text query, restricted to mask.
+
+    Returns (number of matching companies, records ranked best first).
+    """
+    scores, _ = bm25_scores(index, query)
+    matched = scores > 0
+    if mask is not None:
+        matched &= mask
+    rows = np.flatnonzero(matched)
+    if len(rows) > k:
+        best = np.argpartition(-scores[rows], k - 1)[:k]
+        rows = rows[best]
+    # Highest score first; ties keep table order
+    rows = rows[np.lexsort((rows, -scores[rows]))]
+
+    result = companies.loc[rows, list(fields)].astype(object).where(lambda frame: frame.notna(), None)
+    result['score'] = np.round(scores[rows].astype(np.float64), 4)
+    result.insert(0, 'rank', np.arange(1, len(rows) + 1))
+    return int(matched.sum()), result.to_dict(orient='records')
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+from collections import Counter
+from scipy import sparse
+from search import tokenize
+
+# Company column -> weight of its terms in the company's vector
+SIMILARITY_FIELDS = {
+    'specialities': 2,
+    'description': 1,
+    'industry': 3
+}
+# Fields matched as one whole value (e.g. the industry name) rather than word by word
+WHOLE_VALUE_FIELDS = {'industry'}
+
+SIMILAR_K = 10
+# Dense similarity cells per block of rows (float32), so exact mode stays around 64 MB at any size
+BLOCK_CELLS = 2 ** 24
+# Above this many companies the precompute switches to the approximate mode. On the current
+# 158 companies the approximate top 5 contains 85% of the exact top 5 (recall@5; 86% at k=10),
+# while reaching 98% of the exact neighbours' summed similarity: the misses are near-ties.
+APPROXIMATE_THRESHOLD = 50000
+# Approximate mode: candidates come from each company's APPROX_TERMS heaviest terms, ignoring
+# terms shared by more than APPROX_MAX_DOC_FREQ companies, and the best k * APPROX_CANDIDATES
+# candidates are re-scored exactly
+APPROX_TERMS = 32
+APPROX_MAX_DOC_FREQ = 2000
+APPROX_CANDIDATES = 4
+APPROX_BLOCK_ROWS = 2048
+
+
+def company_terms(values):
+    """Weighted term counts for one company from its SIMILARITY_FIELDS values."""
+    counts = Counter()
+    for (field, weight), value in zip(SIMILARITY_FIELDS.items(), values):
+        if field in WHOLE_VALUE_FIELDS:
+            if value is not None and pd.notna(value):
+                counts[f'{field}={value}'] += weight
+        else:
+            for term, count in Counter(tokenize(value)).items():
+                counts[term] += count * weight
+    return counts
+
+
+def build_term_matrix(companies):
+    """L2-normalized TF-IDF rows (sublinear tf), one per company, as a CSR matrix."""
+    terms = {}
+    indptr, indices, counts = [0], [], []
+    columns = [companies[field].tolist() if field in companies else [None] * len(companies)
+               for field in SIMILARITY_FIELDS]
+    for values in zip(*columns):
+        for term, count in company_terms(values).items():
+            indices.append(terms.setdefault(term, len(terms)))
+            counts.append(count)
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix((np.asarray(counts, dtype=np.float32), indices, indptr),
+                               shape=(len(companies), len(terms)))
+    doc_freqs = np.bincount(matrix.indices, minlength=len(terms))
+    idf = np.log((1 + len(companies)) / (1 + doc_freqs)) + 1
+    matrix.data = (1 + np.log(matrix.data)) * idf[matrix.indices].astype(np.float32)
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms.astype(np.float32)) @ matrix)
+
+
+def _row_top_k(rows, cols, sims, k):
+    """Best k (col, sim) per row from candidate pairs; pairs must be unique. Returns {row: (cols, sims)}."""
+    order = np.lexsort((cols, -sims, rows))
+    rows, cols, sims = rows[order], cols[order], sims[order]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    rank = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+    keep = rank < k
+    rows, cols, sims = rows[keep], cols[keep], sims[keep]
+    bounds = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1], True])
+    return {int(rows[a]): (cols[a:b], sims[a:b]) for a, b in zip(bounds[:-1], bounds[1:])}
+
+
+def exact_neighbours(matrix, k=SIMILAR_K, block_cells=BLOCK_CELLS):
+    """Top k cosine neighbours of every row, computed one block of rows at a time."""
+    n = matrix.shape[0]
+    transposed = matrix.T.tocsc()
+    block_size = max(1, block_cells // max(n, 1))
+    kk = min(k, n - 1)
+    neighbours = {}
+    if kk < 1:
+        return neighbours
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        sims = (matrix[start:stop] @ transposed).toarray()
+        sims[np.arange(stop - start), np.arange(start, stop)] = 0
+        best = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+        best_sims = np.take_along_axis(sims, best, axis=1)
+        rows = np.repeat(np.arange(start, stop), kk)
+        cols, values = best.ravel(), best_sims.ravel()
+        positive = values > 0
+        neighbours.update(_row_top_k(rows[positive], cols[positive], values[positive], k))
+    return neighbours
+
+
+def prune_terms(matrix, terms_per_row=APPROX_TERMS, max_doc_freq=APPROX_MAX_DOC_FREQ):
+    """Each row's heaviest terms only, without terms shared by more than max_doc_freq rows."""
+    coo = matrix.tocoo()
+    doc_freqs = np.bincount(coo.col, minlength=matrix.shape[1])
+    keep = doc_freqs[coo.col] <= max_doc_freq
+    rows, cols, data = coo.row[keep], coo.col[keep], coo.data[keep]
+
+    order = np.lexsort((-data, rows))
+    rows, cols, data = rows[order], cols[order], data[order]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.empty(0, dtype=np.int64)
+    rank = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+    keep = rank < terms_per_row
+    return sparse.csr_matrix((data[keep], (rows[keep], cols[keep])), shape=matrix.shape)
+
+
+def approximate_neighbours(matrix, k=SIMILAR_K, block_size=APPROX_BLOCK_ROWS):
+    """Top k neighbours among candidates found through each row's heaviest, rarer terms.
+
+    The pruned product stays sparse, so cost follows the candidate pairs rather than n^2;
+    the best k * APPROX_CANDIDATES candidates per row are then scored with the full vectors.
+    """
+    n = matrix.shape[0]
+    pruned = prune_terms(matrix)
+    transposed = pruned.T.tocsc()
+    neighbours = {}
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        product = (pruned[start:stop] @ transposed).tocoo()
+        rows, cols = product.row + start, product.col
+        different = rows != cols
+        candidates = _row_top_k(rows[different], cols[different], product.data[different], k * APPROX_CANDIDATES)
+        if not candidates:
+            continue
+        rows = np.concatenate([np.full(len(c), row) for row, (c, _) in candidates.items()])
+        cols = np.concatenate([c for c, _ in candidates.values()])
+        sims = np.asarray(matrix[rows].multiply(matrix[cols]).sum(axis=1)).ravel()
+        positive = sims > 0
+        neighbours.update(_row_top_k(rows[positive], cols[positive], sims[positive], k))
+    return neighbours
+
+
+def build_similar_index(companies, k=SIMILAR_K, approximate=None, fields=('name', 'industry')):
+    """Each company's k most similar companies, keyed by name.
+
+    approximate=None uses the approximate mode only above APPROXIMATE_THRESHOLD companies.
+    """
+    matrix = build_term_matrix(companies)
+    if approximate is None:
+        approximate = len(companies) > APPROXIMATE_THRESHOLD
+    neighbours = approximate_neighbours(matrix, k) if approximate else exact_neighbours(matrix, k)
+
+    records = companies[list(fields)].astype(object).where(lambda frame: frame.notna(), None).to_dict(orient='records')
+    index = {}
+    for row, name in enumerate(companies['name']):
+        cols, sims = neighbours.get(row, (np.empty(0, dtype=np.int64), np.empty(0)))
+        index[name] = [{**records[col], 'similarity': round(float(sim), 4)} for col, sim in zip(cols, sims)]
+    return {'method': 'approximate' if approximate else 'exact', 'k': k, 'neighbours': index}
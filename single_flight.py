@@ -0,0 +1,85 @@
+import threading
+from functools import wraps
+
+# Seconds a request waits for an identical in-flight computation before giving up with a 503
+SINGLE_FLIGHT_TIMEOUT = 10.0
+
+
+class SingleFlightTimeout(Exception):
+    """Raised to a waiting caller when the shared computation takes longer than the timeout."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time.
+
+    Callers arriving while a computation for their key is running wait for it
+    and share its result (or its exception) instead of starting their own.
+    Nothing is kept once the computation finishes, so this is not a cache.
+    """
+
+    def __init__(self, timeout=SINGLE_FLIGHT_TIMEOUT):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, compute):
+        """compute() for this key, run once across concurrent callers; returns (result, shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if leader:
+            try:
+                call.result = compute()
+            except BaseException as error:
+                call.error = error
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result, False
+
+        if not call.done.wait(self.timeout):
+            raise SingleFlightTimeout(f"Timed out after {self.timeout:g}s waiting for {key[0]}")
+        if call.error is not None:
+            raise call.error
+        return call.result, True
+
+
+def coalesced(flight, version, query_args=()):
+    """Decorator for Flask views: concurrent identical requests share one run of the view.
+
+    Requests are identical when endpoint, view arguments, the query parameters named
+    in query_args and dataset version match. Only parameters the view reads belong in
+    query_args; anything else (e.g. a cache-busting ?_=<ts>) would split requests that
+    produce the same response. The response is frozen to (body, status, headers), so
+    every waiter gets its own Response object.
+    """
+    from flask import Response, request, current_app
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.endpoint, tuple(sorted(kwargs.items())),
+                   tuple((name, tuple(request.args.getlist(name))) for name in query_args), version)
+
+            def compute():
+                response = current_app.make_response(view(*args, **kwargs))
+                return response.get_data(), response.status_code, list(response.headers.items())
+
+            (body, status, headers), shared = flight.do(key, compute)
+            response = Response(body, status=status, headers=headers)
+            response.headers['X-Single-Flight'] = 'shared' if shared else 'leader'
+            return response
+        return wrapper
+    return decorator
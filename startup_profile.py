@@ -0,0 +1,120 @@
+"""Startup profiling for the Flask backend and the Streamlit dashboard.
+
+Set AUSJOBS_PROFILE_STARTUP=1 to record how long every module import takes
+(self and cumulative time, like `python -X importtime`) and how long each
+data-loading step takes. The report is printed once startup has finished.
+
+Set AUSJOBS_PROFILE_STARTUP=flame to also sample the stack for the whole startup
+(dataset loading and index building) and write it as a folded-stack flamegraph
+file to profiles/startup_<dataset version>_<timestamp>.folded (see profiling.py).
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+from importlib.abc import Loader, MetaPathFinder
+
+ENABLED = os.getenv('AUSJOBS_PROFILE_STARTUP', '') not in ('', '0')
+FLAME = os.getenv('AUSJOBS_PROFILE_STARTUP', '') == 'flame'
+
+_started = time.perf_counter()
+_import_times = []  # (module, self seconds, cumulative seconds, nesting depth)
+_step_times = []  # (label, seconds)
+_child_time_stack = []
+_installed = False
+_reported = False
+_sampler = None
+
+
+class _TimedLoader(Loader):
+    """Wraps a module loader and records how long executing the module takes."""
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        _child_time_stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = _child_time_stack.pop()
+            if _child_time_stack:
+                _child_time_stack[-1] += elapsed
+            _import_times.append((module.__name__, elapsed - children, elapsed, len(_child_time_stack)))
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _TimingFinder(MetaPathFinder):
+    """Asks the other finders for a spec and swaps in a timed loader."""
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader)
+                return spec
+        return None
+
+
+def install():
+    """Start timing imports. Call before the heavy imports of an entry point."""
+    global _installed, _sampler
+    if ENABLED and not _installed:
+        sys.meta_path.insert(0, _TimingFinder())
+        _installed = True
+        if FLAME:
+            from profiling import Sampler
+            _sampler = Sampler().start()
+
+
+@contextmanager
+def timed(label):
+    """Record the duration of a startup step such as loading a dataset."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _step_times.append((label, time.perf_counter() - start))
+
+
+def report(top=25, stream=None, version=None):
+    """Print the import and data-load timings once per process."""
+    global _reported
+    if not ENABLED or _reported:
+        return
+    _reported = True
+    stream = stream or sys.stderr
+
+    if _sampler is not None:
+        from profiling import profile_path
+        _sampler.stop()
+        path = profile_path('startup', version or 'unversioned', mode='sample')
+        _sampler.write(path)
+        print(f"\nStartup flamegraph samples written to {path}", file=stream)
+
+    total = time.perf_counter() - _started
+    print(f"\n=== Startup profile: {total * 1000:.0f} ms since profiling started ===", file=stream)
+
+    print(f"\nTop {top} imports by cumulative time (ms):", file=stream)
+    print(f"{'self':>9} | {'cumulative':>10} | module", file=stream)
+    for name, self_time, cumulative, depth in sorted(_import_times, key=lambda t: t[2], reverse=True)[:top]:
+        print(f"{self_time * 1000:9.1f} | {cumulative * 1000:10.1f} | {'  ' * depth}{name}", file=stream)
+
+    top_level = sum(cumulative for _, _, cumulative, depth in _import_times if depth == 0)
+    print(f"\nTotal import time: {top_level * 1000:.0f} ms across {len(_import_times)} modules", file=stream)
+
+    if _step_times:
+        print("\nData loading (ms):", file=stream)
+        for label, seconds in _step_times:
+            print(f"{seconds * 1000:9.1f} | {label}", file=stream)
+    print(file=stream)
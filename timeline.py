@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from rankings import COMPANY_FIELDS
+
+# Fields (query parameter names, as in COMPANY_FIELDS) with a group x year founding matrix
+TIMELINE_DIMENSIONS = ['industry', 'country', 'size']
+
+
+def build_founding_matrices(companies):
+    """Founding counts per year, overall and as a dense group x year matrix per dimension.
+
+    Years run contiguously from the earliest to the latest founding year, so series
+    line up by position and years without foundings count 0.
+    """
+    years = pd.to_numeric(companies['founded_year'], errors='coerce')
+    has_year = years.notna().to_numpy()
+    if not has_year.any():
+        return {'years': np.array([], dtype=np.int64), 'total': np.array([], dtype=np.int64), 'dimensions': {}}
+
+    year_values = years.to_numpy()[has_year].astype(np.int64)
+    first_year = int(year_values.min())
+    n_years = int(year_values.max()) - first_year + 1
+    year_index = np.full(len(companies), -1, dtype=np.int64)
+    year_index[has_year] = year_values - first_year
+
+    dimensions = {}
+    for field in TIMELINE_DIMENSIONS:
+        codes, labels = pd.factorize(companies[COMPANY_FIELDS[field]])
+        valid = (codes >= 0) & (year_index >= 0)
+        cells = np.bincount(codes[valid] * n_years + year_index[valid], minlength=len(labels) * n_years)
+        dimensions[field] = {
+            'labels': {str(label): i for i, label in enumerate(labels)},
+            'matrix': cells.reshape(len(labels), n_years)
+        }
+
+    return {
+        'years': np.arange(first_year, first_year + n_years),
+        'total': np.bincount(year_index[has_year], minlength=n_years),
+        'dimensions': dimensions
+    }
+
+
+def founding_series(matrices, field=None, labels=None):
+    """Per-year, cumulative and growth series for companies in the given groups of one dimension.
+
+    Growth is the year's foundings as a percentage of the companies founded before it
+    (None while there are none). Cost is proportional to the number of years and groups
+    selected, not the number of companies. Raises ValueError for labels that are not
+    groups of the dimension.
+    """
+    if field is None:
+        counts = matrices['total']
+    else:
+        dimension = matrices['dimensions'][field]
+        unknown = [label for label in labels if label not in dimension['labels']]
+        if unknown:
+            raise ValueError(f"Unknown {field}: {', '.join(unknown)}")
+        rows = [dimension['labels'][label] for label in labels]
+        counts = dimension['matrix'][rows].sum(axis=0)
+
+    cumulative = np.cumsum(counts)
+    previous = np.concatenate([[0], cumulative[:-1]])
+    growth = [round(100 * int(count) / int(before), 2) if before else None for count, before in zip(counts, previous)]
+    return {
+        'years': matrices['years'].tolist(),
+        'counts': counts.tolist(),
+        'cumulative': cumulative.tolist(),
+        'growth': growth
+    }
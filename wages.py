@@ -0,0 +1,120 @@
+import pandas as pd
+
+# Measure used per dimension: all are full-time adult average weekly ordinary time earnings
+WAGE_MEASURES = {
+    'state': 'Persons',
+    'industry': 'Persons',
+    'sector': 'Full-time adult average weekly ordinary time earnings'
+}
+NATIONAL = 'Australia'
+
+# LinkedIn industry -> ABS (ANZSIC division) industry in the earnings workbooks
+ABS_INDUSTRIES = {
+    'Software Development': 'Professional, scientific & technical services',
+    'IT Services and IT Consulting': 'Professional, scientific & technical services',
+    'Information Technology and Services': 'Professional, scientific & technical services',
+    'Computer and Network Security': 'Professional, scientific & technical services',
+    'Desktop Computing Software Products': 'Professional, scientific & technical services',
+    'Business Consulting and Services': 'Professional, scientific & technical services',
+    'Advertising Services': 'Professional, scientific & technical services',
+    'Marketing Services': 'Professional, scientific & technical services',
+    'Public Relations and Communications Services': 'Professional, scientific & technical services',
+    'Law Practice': 'Professional, scientific & technical services',
+    'Accounting': 'Professional, scientific & technical services',
+    'Biotechnology Research': 'Professional, scientific & technical services',
+    'Biotechnology': 'Professional, scientific & technical services',
+    'Think Tanks': 'Professional, scientific & technical services',
+    'Staffing and Recruiting': 'Administrative & support services',
+    'Security and Investigations': 'Administrative & support services',
+    'Leisure, Travel & Tourism': 'Administrative & support services',
+    'Financial Services': 'Financial & insurance services',
+    'Insurance': 'Financial & insurance services',
+    'Transportation, Logistics, Supply Chain and Storage': 'Transport, postal & warehousing',
+    'Transportation/Trucking/Railroad': 'Transport, postal & warehousing',
+    'Truck Transportation': 'Transport, postal & warehousing',
+    'Airlines and Aviation': 'Transport, postal & warehousing',
+    'Hospitals and Health Care': 'Health care & social assistance',
+    'Individual and Family Services': 'Health care & social assistance',
+    'Medical Equipment Manufacturing': 'Manufacturing',
+    'Medical Devices': 'Manufacturing',
+    'Pharmaceutical Manufacturing': 'Manufacturing',
+    'Semiconductor Manufacturing': 'Manufacturing',
+    'Defense and Space Manufacturing': 'Manufacturing',
+    'Machinery Manufacturing': 'Manufacturing',
+    'Manufacturing': 'Manufacturing',
+    'Food & Beverages': 'Manufacturing',
+    'Food Production': 'Manufacturing',
+    'Telecommunications': 'Information media & telecommunications',
+    'Technology, Information and Internet': 'Information media & telecommunications',
+    'Internet Publishing': 'Information media & telecommunications',
+    'Internet News': 'Information media & telecommunications',
+    'Construction': 'Construction',
+    'Real Estate': 'Rental, hiring & real estate services',
+    'Hospitality': 'Accommodation & food services',
+    'Oil and Gas': 'Mining',
+    'Mining': 'Mining',
+    'Education Management': 'Education & training',
+    'Professional Training and Coaching': 'Education & training',
+    'Retail': 'Retail trade',
+    'Government Administration': 'Public administration & safety',
+    'Health, Wellness and Fitness': 'Arts & recreation services',
+    'Wellness and Fitness Services': 'Arts & recreation services'
+}
+
+
+def _round(value):
+    return None if value is None or pd.isna(value) else round(float(value), 1)
+
+
+def build_wage_lookup(earnings):
+    """Weekly earnings series per dimension and category, plus the latest level of each.
+
+    Returns {'period': latest period, 'series': {dimension: {category: [{period, value}]}},
+    'latest': {dimension: {category: value}}}.
+    """
+    measures = earnings['dimension'].map(WAGE_MEASURES)
+    wages = earnings[earnings['measure'] == measures].sort_values('period')
+
+    series, latest = {}, {}
+    for dimension, rows in wages.groupby('dimension'):
+        series[dimension] = {
+            category: [{'period': period, 'value': _round(value)}
+                       for period, value in zip(group['period'], group['value'])]
+            for category, group in rows.groupby('category')
+        }
+        latest[dimension] = rows.groupby('category')['value'].last().to_dict()
+
+    return {'period': wages['period'].max(), 'series': series, 'latest': latest}
+
+
+def build_company_wages(companies, lookup):
+    """Prevailing weekly earnings for each company's state and industry, keyed by name."""
+    state_levels = lookup['latest'].get('state', {})
+    industry_levels = lookup['latest'].get('industry', {})
+    national = state_levels.get(NATIONAL)
+
+    # Only Australian headquarters have an ABS state
+    states = companies['hq_state'].where(companies['hq_country'] == 'AU')
+    abs_industries = companies['industry'].map(ABS_INDUSTRIES)
+    frame = pd.DataFrame({
+        'name': companies['name'],
+        'state': states,
+        'state_weekly_earnings': states.map(state_levels),
+        'industry': companies['industry'],
+        'abs_industry': abs_industries,
+        'industry_weekly_earnings': abs_industries.map(industry_levels)
+    })
+
+    result = {}
+    for row in frame.to_dict(orient='records'):
+        result[row['name']] = {
+            'company': row['name'],
+            'period': lookup['period'],
+            'national_weekly_earnings': _round(national),
+            'state': row['state'] if pd.notna(row['state']) else None,
+            'state_weekly_earnings': _round(row['state_weekly_earnings']),
+            'industry': row['industry'] if pd.notna(row['industry']) else None,
+            'abs_industry': row['abs_industry'] if pd.notna(row['abs_industry']) else None,
+            'industry_weekly_earnings': _round(row['industry_weekly_earnings'])
+        }
+    return result